@@ -0,0 +1,71 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Sequence
+
+from app.annotations.schemas import AnnotationIn
+
+Box = tuple[float, float, float, float, str]
+
+
+@dataclass
+class AnnotationDiff:
+    keep: list[Mapping[str, Any]] = field(default_factory=list)
+    update: list[tuple[Mapping[str, Any], AnnotationIn]] = field(default_factory=list)
+    insert: list[AnnotationIn] = field(default_factory=list)
+    delete: list[Mapping[str, Any]] = field(default_factory=list)
+
+    @property
+    def is_noop(self) -> bool:
+        return not (self.update or self.insert or self.delete)
+
+
+def _box(x: float, y: float, w: float, h: float, tag: str) -> Box:
+    return (x, y, w, h, tag)
+
+
+def diff_annotations(
+    existing: Sequence[Mapping[str, Any]],
+    desired: Sequence[AnnotationIn]
+) -> AnnotationDiff:
+    """
+    Work out the smallest set of writes that turns the stored rows
+    (`id, x, y, w, h, tag_id, tag`) into the desired boxes.
+
+    Identical boxes are kept untouched. Leftover stored rows are rewritten
+    in place, preferring rows with the same tag so their tag usage does not
+    move, and only the surplus on either side becomes an insert or delete.
+    """
+    diff = AnnotationDiff()
+
+    stored: dict[Box, list[Mapping[str, Any]]] = defaultdict(list)
+    for row in existing:
+        stored[_box(row["x"], row["y"], row["w"], row["h"], row["tag"])].append(row)
+
+    unmatched: list[AnnotationIn] = []
+    for annotation in desired:
+        rows = stored.get(_box(annotation.x, annotation.y, annotation.w, annotation.h, annotation.tag))
+        if rows:
+            diff.keep.append(rows.pop())
+        else:
+            unmatched.append(annotation)
+
+    leftover_by_tag: dict[str, list[Mapping[str, Any]]] = defaultdict(list)
+    for rows in stored.values():
+        for row in rows:
+            leftover_by_tag[row["tag"]].append(row)
+
+    retagged: list[AnnotationIn] = []
+    for annotation in unmatched:
+        rows = leftover_by_tag.get(annotation.tag)
+        if rows:
+            diff.update.append((rows.pop(), annotation))
+        else:
+            retagged.append(annotation)
+
+    leftover = [row for rows in leftover_by_tag.values() for row in rows]
+    for row, annotation in zip(leftover, retagged):
+        diff.update.append((row, annotation))
+
+    diff.insert = retagged[len(leftover):]
+    diff.delete = leftover[len(retagged):]
+    return diff
@@ -1,20 +1,35 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime,Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime,Float, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from datetime import datetime
 
 from app.database import Base
 
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    # Maintained by the annotation write paths (see app/annotations/tags.py)
+    usage_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "name", name="uq_tags_project_id_name"),
+    )
+
 class Annotation(Base):
     __tablename__ = "annotations"
 
     id = Column(Integer, primary_key=True, index=True)
-    image_id = Column(Integer, ForeignKey("images.id"), nullable=False)
+    image_id = Column(Integer, ForeignKey("images.id", ondelete="CASCADE"), nullable=False, index=True)
     x = Column(Float, nullable=False)
     y = Column(Float, nullable=False)
     w = Column(Float, nullable=False)
     h = Column(Float, nullable=False)
-    tag = Column(String, nullable=False)
+    tag_id = Column(Integer, ForeignKey("tags.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.now)
 
     image = relationship("Image", back_populates="annotations")
-
+    tag_ref = relationship("Tag", lazy="joined")
+    tag = association_proxy("tag_ref", "name")
@@ -1,122 +1,339 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
-from sqlalchemy.orm import Session
-from sqlalchemy import distinct, and_
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, exists, func, insert, select, update
+from collections import Counter
 from datetime import datetime
 from typing import List
 
-from app.database import get_db
-from app.projects.models import Project
-from app.annotations.models import Annotation
-from app.annotations.schemas import AnnotationRequest, AnnotationResponse
-from app.auth.security import get_current_user
-from app.auth.models import User
+from app.database import get_async_db
+from app.projects.ownership import ProjectRef, get_project_for_user, get_project_for_write
+from app.annotations.models import Annotation, Tag
+from app.annotations.schemas import AnnotationRequest, AnnotationResponse, BulkAnnotationRequest, ReplaceAnnotationsRequest, TagCountResponse
+from app.annotations.diffing import diff_annotations
+from app.annotations.tags import acquire_tags, adjust_tag_usage, ensure_tags, release_tags
+from app.projects.stats import bump_project_stats
 from app.images.models import Image
 
 router = APIRouter(prefix="/projects/{project_id}/annotations", tags=["annotations"])
 
-# Dependency to verify project ownership
-def get_project_for_user(project_id: int = Path(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return project
-
 @router.get("/tags", response_model=List[str], status_code=200)
-def get_tags(
-    project: Project = Depends(get_project_for_user),
-    db: Session = Depends(get_db)
+async def get_tags(
+    project: ProjectRef = Depends(get_project_for_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    tags = await db.scalars(
+        select(Tag.name)
+        .where(Tag.project_id == project.id, Tag.usage_count > 0)
+        .order_by(Tag.name)
+    )
+    return tags.all()
+
+@router.get("/tags/counts", response_model=List[TagCountResponse], status_code=200)
+async def get_tag_counts(
+    project: ProjectRef = Depends(get_project_for_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    tags = (
-        db.query(distinct(Annotation.tag))
-        .join(Image)
-        .filter(Image.project_id == project.id)
-        .all()
+    rows = await db.execute(
+        select(Tag.name, Tag.usage_count.label("count"))
+        .where(Tag.project_id == project.id, Tag.usage_count > 0)
+        .order_by(Tag.usage_count.desc(), Tag.name)
     )
-    res = [t[0] for t in tags]
-    return res
+    return rows.mappings().all()
 
 @router.post("", response_model=AnnotationResponse, status_code=201)
-def create_annotation(
+async def create_annotation(
     annotation_request: AnnotationRequest,
-    project: Project = Depends(get_project_for_user),
-    db: Session = Depends(get_db),
+    project: ProjectRef = Depends(get_project_for_write),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    image = (
-        db.query(Image)
-        .filter(
+    # Lock the image before its tags and stats: is_annotated decides the
+    # stats delta, and every annotation write locks image -> tags -> stats
+    image = await db.scalar(
+        select(Image)
+        .where(
             Image.id == annotation_request.image_id,
             Image.project_id == project.id
         )
-        .first()
+        .with_for_update()
     )
 
     if not image:
         raise HTTPException(status_code=404, detail="Image not found in this project")
 
+    tag_ids = await db.run_sync(acquire_tags, project.id, [annotation_request.annotation.tag])
+
     new_annotation = Annotation(
         image_id=annotation_request.image_id,
         x=annotation_request.annotation.x,
         y=annotation_request.annotation.y,
         w=annotation_request.annotation.w,
         h=annotation_request.annotation.h,
-        tag=annotation_request.annotation.tag,
+        tag_id=tag_ids[annotation_request.annotation.tag],
         created_at=datetime.now(),
     )
 
     db.add(new_annotation)
+    await db.run_sync(bump_project_stats, project.id, boxes=1, annotated=0 if image.is_annotated else 1)
     image.is_annotated = True
-    db.commit()
+    image.claimed_until = None
+    await db.commit()
 
-    db.refresh(new_annotation)
-    db.refresh(image)
+    await db.refresh(new_annotation)
 
     return new_annotation
 
+@router.post("/bulk", response_model=List[AnnotationResponse], status_code=201)
+async def create_annotations_bulk(
+    bulk_request: BulkAnnotationRequest,
+    project: ProjectRef = Depends(get_project_for_write),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create every box for an image in a single transaction.
+    One multi-row INSERT ... RETURNING replaces a commit + refresh per box.
+    """
+    if not bulk_request.annotations:
+        raise HTTPException(status_code=400, detail="No annotations provided")
+
+    # Locked for the same reason as in create_annotation
+    image = await db.scalar(
+        select(Image)
+        .where(
+            Image.id == bulk_request.image_id,
+            Image.project_id == project.id
+        )
+        .with_for_update()
+    )
+
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found in this project")
+
+    tag_ids = await db.run_sync(acquire_tags, project.id, [a.tag for a in bulk_request.annotations])
+    tag_names = {tag_id: name for name, tag_id in tag_ids.items()}
+
+    now = datetime.now()
+    rows = [
+        {
+            "image_id": image.id,
+            "x": annotation.x,
+            "y": annotation.y,
+            "w": annotation.w,
+            "h": annotation.h,
+            "tag_id": tag_ids[annotation.tag],
+            "created_at": now,
+        }
+        for annotation in bulk_request.annotations
+    ]
+
+    created = (await db.execute(
+        insert(Annotation)
+        .values(rows)
+        .returning(
+            Annotation.id,
+            Annotation.image_id,
+            Annotation.x,
+            Annotation.y,
+            Annotation.w,
+            Annotation.h,
+            Annotation.tag_id,
+            Annotation.created_at,
+        )
+    )).mappings().all()
+
+    await db.run_sync(bump_project_stats, project.id, boxes=len(created), annotated=0 if image.is_annotated else 1)
+    image.is_annotated = True
+    image.claimed_until = None
+    await db.commit()
+
+    return [{**row, "tag": tag_names[row["tag_id"]]} for row in created]
+
 @router.get("/{image_id}", response_model=List[AnnotationResponse], status_code=200)
-def get_annotations_for_image(
+async def get_annotations_for_image(
     image_id: int,
-    project: Project = Depends(get_project_for_user),
-    db: Session = Depends(get_db),
+    project: ProjectRef = Depends(get_project_for_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Ensure the image belongs to the project
-    image = db.query(Image).filter(Image.id == image_id, Image.project_id == project.id).first()
+    image_exists = await db.scalar(
+        select(Image.id).where(Image.id == image_id, Image.project_id == project.id)
+    )
+    if not image_exists:
+        raise HTTPException(status_code=404, detail="Image not found in this project")
+
+    annotations = await db.scalars(
+        select(Annotation)
+        .where(Annotation.image_id == image_id)
+    )
+    return annotations.all()
+
+@router.put("/{image_id}", response_model=List[AnnotationResponse], status_code=200)
+async def replace_annotations(
+    image_id: int,
+    replace_request: ReplaceAnnotationsRequest,
+    project: ProjectRef = Depends(get_project_for_write),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Make the image's boxes exactly the requested set. The stored rows are
+    diffed against it so only the boxes that changed are written, all in one
+    transaction; re-saving an unchanged image writes nothing.
+    """
+    # Lock the image so concurrent saves of the same image diff in turn
+    image = await db.scalar(
+        select(Image)
+        .where(Image.id == image_id, Image.project_id == project.id)
+        .with_for_update()
+    )
     if not image:
         raise HTTPException(status_code=404, detail="Image not found in this project")
 
-    annotations = (
-        db.query(Annotation)
-        .filter(Annotation.image_id == image_id)
-        .all()
+    existing = (await db.execute(
+        select(
+            Annotation.id,
+            Annotation.image_id,
+            Annotation.x,
+            Annotation.y,
+            Annotation.w,
+            Annotation.h,
+            Annotation.tag_id,
+            Annotation.created_at,
+            Tag.name.label("tag"),
+        )
+        .join(Tag, Tag.id == Annotation.tag_id)
+        .where(Annotation.image_id == image.id)
+    )).mappings().all()
+
+    diff = diff_annotations(existing, replace_request.annotations)
+    if diff.is_noop:
+        # Nothing to write, but the save still hands the image back
+        if image.claimed_until is not None:
+            image.claimed_until = None
+            await db.commit()
+        return sorted(existing, key=lambda row: row["id"])
+
+    retagged = [(row, annotation) for row, annotation in diff.update if row["tag"] != annotation.tag]
+    added = [a.tag for a in diff.insert] + [a.tag for _, a in retagged]
+    removed = [row["tag_id"] for row in diff.delete] + [row["tag_id"] for row, _ in retagged]
+
+    # Net change per tag in one id-ordered pass, so two relabels in opposite
+    # directions on different images cannot lock the tags crosswise
+    tag_ids = await db.run_sync(ensure_tags, project.id, added)
+    usage = Counter(tag_ids[name] for name in added)
+    usage.subtract(removed)
+    await db.run_sync(adjust_tag_usage, usage)
+
+    if diff.delete:
+        await db.execute(
+            delete(Annotation)
+            .where(Annotation.id.in_([row["id"] for row in diff.delete]))
+            .execution_options(synchronize_session=False)
+        )
+
+    updated = [
+        {
+            "id": row["id"],
+            "x": annotation.x,
+            "y": annotation.y,
+            "w": annotation.w,
+            "h": annotation.h,
+            "tag_id": tag_ids.get(annotation.tag, row["tag_id"]),
+        }
+        for row, annotation in diff.update
+    ]
+    if updated:
+        await db.execute(update(Annotation), updated)
+
+    created = []
+    if diff.insert:
+        now = datetime.now()
+        created = (await db.execute(
+            insert(Annotation)
+            .values([
+                {
+                    "image_id": image.id,
+                    "x": annotation.x,
+                    "y": annotation.y,
+                    "w": annotation.w,
+                    "h": annotation.h,
+                    "tag_id": tag_ids[annotation.tag],
+                    "created_at": now,
+                }
+                for annotation in diff.insert
+            ])
+            .returning(
+                Annotation.id,
+                Annotation.image_id,
+                Annotation.x,
+                Annotation.y,
+                Annotation.w,
+                Annotation.h,
+                Annotation.tag_id,
+                Annotation.created_at,
+            )
+        )).mappings().all()
+
+    was_annotated = image.is_annotated
+    is_annotated = await db.scalar(
+        update(Image)
+        .where(Image.id == image.id)
+        .values(is_annotated=exists().where(Annotation.image_id == image.id), claimed_until=None)
+        .returning(Image.is_annotated)
+        .execution_options(synchronize_session=False)
     )
-    return annotations
+    await db.run_sync(
+        bump_project_stats,
+        project.id,
+        boxes=len(diff.insert) - len(diff.delete),
+        annotated=int(is_annotated) - int(was_annotated),
+    )
+    await db.commit()
+
+    tag_names = {tag_id: name for name, tag_id in tag_ids.items()}
+    result = [dict(row) for row in diff.keep]
+    result += [
+        {**row, **values, "tag": annotation.tag}
+        for (row, annotation), values in zip(diff.update, updated)
+    ]
+    result += [{**row, "tag": tag_names[row["tag_id"]]} for row in created]
+    return sorted(result, key=lambda row: row["id"])
 
 @router.delete("/delete/{annotation_id}/{image_id}", status_code=204)
-def delete_annotation(
+async def delete_annotation(
     annotation_id: int,
     image_id: int,
-    project: Project = Depends(get_project_for_user),
-    db: Session = Depends(get_db),
+    project: ProjectRef = Depends(get_project_for_write),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Ensure the image belongs to the project
-    image = db.query(Image).filter(Image.id == image_id, Image.project_id == project.id).first()
+    # Locked for the same reason as in create_annotation
+    image = await db.scalar(
+        select(Image)
+        .where(Image.id == image_id, Image.project_id == project.id)
+        .with_for_update()
+    )
     if not image:
         raise HTTPException(status_code=404, detail="Image not found in this project")
 
-    annotation = (
-        db.query(Annotation)
-        .filter(Annotation.id == annotation_id, Annotation.image_id == image.id)
-        .first()
+    annotation = await db.scalar(
+        select(Annotation)
+        .where(Annotation.id == annotation_id, Annotation.image_id == image.id)
     )
 
     if not annotation:
         raise HTTPException(status_code=404, detail="Annotation not found")
 
-    db.delete(annotation)
-    db.flush()
+    await db.run_sync(release_tags, [annotation.tag_id])
+    await db.delete(annotation)
+    await db.flush()
 
     # Check if any annotations are left for the image
-    remaining_annotations = db.query(Annotation).filter(Annotation.image_id == image_id).count()
+    remaining_annotations = await db.scalar(
+        select(func.count()).select_from(Annotation).where(Annotation.image_id == image_id)
+    )
+    unannotated = remaining_annotations == 0 and image.is_annotated
     if remaining_annotations == 0:
         image.is_annotated = False
 
-    db.commit()
+    await db.run_sync(bump_project_stats, project.id, boxes=-1, annotated=-1 if unannotated else 0)
+
+    await db.commit()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field,ConfigDict
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class AnnotationIn(BaseModel):
@@ -13,6 +13,13 @@ class AnnotationRequest(BaseModel):
     image_id: int
     annotation: AnnotationIn
 
+class BulkAnnotationRequest(BaseModel):
+    image_id: int
+    annotations: List[AnnotationIn]
+
+class ReplaceAnnotationsRequest(BaseModel):
+    annotations: List[AnnotationIn]
+
 class AnnotationResponse(BaseModel):
     id: int
     image_id: int
@@ -24,3 +31,9 @@ class AnnotationResponse(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class TagCountResponse(BaseModel):
+    name: str
+    count: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,91 @@
+from collections import Counter
+from typing import Iterable, Mapping
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.annotations.models import Annotation, Tag
+
+
+def ensure_tags(db: Session, project_id: int, names: Iterable[str]) -> dict[str, int]:
+    """
+    Get-or-create the project's tags for `names` without touching their
+    counts. Returns {name: tag_id}. New names are inserted in name order so
+    two saves creating the same new tags wait on each other in turn.
+    """
+    names = sorted(set(names))
+    if not names:
+        return {}
+
+    db.execute(
+        insert(Tag)
+        .values([{"project_id": project_id, "name": name, "usage_count": 0} for name in names])
+        .on_conflict_do_nothing(constraint="uq_tags_project_id_name")
+    )
+    rows = db.execute(
+        select(Tag.name, Tag.id).where(Tag.project_id == project_id, Tag.name.in_(names))
+    )
+    return {name: tag_id for name, tag_id in rows}
+
+
+def adjust_tag_usage(db: Session, deltas: Mapping[int, int]) -> None:
+    """
+    Apply {tag_id: delta} to the usage counts in one UPDATE.
+
+    Every writer of tag counts comes through here: the rows are locked in
+    tag id order first, so concurrent transactions always queue on the
+    shared tag rows in the same order and cannot deadlock. Callers do all
+    their tag changes in one call, after any ensure_tags().
+    """
+    deltas = {tag_id: n for tag_id, n in deltas.items() if n}
+    if not deltas:
+        return
+
+    tag_ids = sorted(deltas)
+    db.execute(select(Tag.id).where(Tag.id.in_(tag_ids)).order_by(Tag.id).with_for_update())
+    db.execute(
+        update(Tag)
+        .where(Tag.id.in_(tag_ids))
+        .values(usage_count=Tag.usage_count + case(deltas, value=Tag.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def acquire_tags(db: Session, project_id: int, names: Iterable[str]) -> dict[str, int]:
+    """
+    Get-or-create the project's tags for `names` and add one use per
+    occurrence. Returns {name: tag_id}.
+    """
+    names = list(names)
+    tag_ids = ensure_tags(db, project_id, names)
+    adjust_tag_usage(db, Counter(tag_ids[name] for name in names))
+    return tag_ids
+
+
+def release_tags(db: Session, tag_ids: Iterable[int]) -> None:
+    """Remove one use per occurrence of each tag id."""
+    adjust_tag_usage(db, {tag_id: -n for tag_id, n in Counter(tag_ids).items()})
+
+
+def count_image_tags(db: Session, image_ids: list[int]) -> Counter:
+    """{tag_id: number of annotations using it} across these images."""
+    if not image_ids:
+        return Counter()
+
+    rows = db.execute(
+        select(Annotation.tag_id, func.count())
+        .where(Annotation.image_id.in_(image_ids))
+        .group_by(Annotation.tag_id)
+    )
+    return Counter(dict(rows.all()))
+
+
+def release_image_tags(db: Session, image_ids: list[int]) -> int:
+    """
+    Remove the uses of every annotation on these images. Returns how many
+    annotations were released.
+    """
+    uses = count_image_tags(db, image_ids)
+    adjust_tag_usage(db, {tag_id: -n for tag_id, n in uses.items()})
+    return sum(uses.values())
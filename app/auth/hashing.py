@@ -0,0 +1,109 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import PasswordHashSettings
+
+from dotenv import load_dotenv
+load_dotenv()
+
+hash_settings = PasswordHashSettings()
+
+@lru_cache(maxsize=None)
+def get_pwd_context(rounds: int) -> CryptContext:
+    # min/max pinned to the configured cost so needs_update() flags hashes
+    # made with a higher or a lower cost.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+# Run inside the pool processes
+def _hash(pwd: str, rounds: int) -> str:
+    return get_pwd_context(rounds).hash(pwd)
+
+def _verify_and_update(plain_pwd: str, hashed_pwd: str, rounds: int) -> tuple[bool, str | None]:
+    return get_pwd_context(rounds).verify_and_update(plain_pwd, hashed_pwd)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated process pool so a burst of logins burns
+    those CPUs instead of the request threadpool. At most `max_pending`
+    calls may be queued; beyond that callers get a 503 straight away.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self, executor: Executor | None = None) -> None:
+        """
+        Start the pool up front (the app's startup hook does this) so no
+        request pays the worker start-up. Tests pass a small in-process
+        executor instead of spawning bcrypt processes.
+        """
+        with self._lock:
+            if self._pool is not None:
+                return
+            if executor is None:
+                # spawn: never fork a process that is already running threads
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            self._pool = executor
+
+    def _get_pool(self) -> Executor:
+        # Fallback for callers that never ran the startup hook
+        self.start()
+        return self._pool
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, try again later",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, pwd: str) -> str:
+        return await self._run(_hash, pwd, self.rounds)
+
+    async def verify_and_update(self, plain_pwd: str, hashed_pwd: str) -> tuple[bool, str | None]:
+        """Returns (is_valid, new_hash); new_hash is set when the cost changed."""
+        return await self._run(_verify_and_update, plain_pwd, hashed_pwd, self.rounds)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=hash_settings.PASSWORD_HASH_WORKERS,
+    max_pending=hash_settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=hash_settings.BCRYPT_ROUNDS
+)
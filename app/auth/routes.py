@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer,OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 
 from app.database import get_db
 from app.auth.models import User
-from app.auth.security import hash_password, verify_password,create_token
+from app.auth.security import create_token
+from app.auth.hashing import password_hasher
 from app.auth.schemas import RegisterResponse, LoginResponse,RegisterRequest
 
 
@@ -12,25 +14,35 @@ router = APIRouter(prefix="/auth",tags=["auth"])
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# register/login are async so bcrypt is awaited on the hashing pool instead
+# of holding a threadpool slot; the DB calls are pushed to the threadpool.
 @router.post("/register",response_model=RegisterResponse,status_code=201)
-def register(userData:RegisterRequest,db:Session=Depends(get_db)):
-    if db.query(User).filter(User.email==userData.email).first():
+async def register(userData:RegisterRequest,db:Session=Depends(get_db)):
+    if await run_in_threadpool(lambda: db.query(User).filter(User.email==userData.email).first()):
         raise HTTPException(status_code=400,detail="Email already registered")
     
-    new_user = User(email=userData.email,hashed_password=hash_password(userData.password))
+    hashed_password = await password_hasher.hash(userData.password)
+    new_user = User(email=userData.email,hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
+    await run_in_threadpool(db.commit)
     
     return {"message":"User registered Successfully"}
 
 
 @router.post("/login",response_model=LoginResponse,status_code=200)
-def login(form_data:OAuth2PasswordRequestForm=Depends(),db:Session=Depends(get_db)):
-    user = db.query(User).filter(User.email==form_data.username).first()
+async def login(form_data:OAuth2PasswordRequestForm=Depends(),db:Session=Depends(get_db)):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email==form_data.username).first())
     if not user:
         raise HTTPException(status_code=404,detail="User does not exist")
-    if not verify_password(form_data.password,user.hashed_password):
+
+    is_valid, new_hash = await password_hasher.verify_and_update(form_data.password,user.hashed_password)
+    if not is_valid:
         raise HTTPException(status_code=401,detail="Invalid Credentials")
+
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
     
     token = create_token(user.id)
     return {"access_token":token,"token_type":"bearer"}
@@ -1,14 +1,17 @@
-from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime,timedelta
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose.exceptions import ExpiredSignatureError, JWTError
 
 from app.config import JWTSettings
-from app.database import get_db
+from app.database import get_async_db
 from app.auth.models import User
+from app.auth.hashing import get_pwd_context, hash_settings
+from app.core.local_cache import TTLCache
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -17,11 +20,21 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 jwt_settings = JWTSettings()
 
-pwd_context = CryptContext(schemes = ["bcrypt"],deprecated="auto")
+pwd_context = get_pwd_context(hash_settings.BCRYPT_ROUNDS)
 secret_key = jwt_settings.SECRET_KEY
 algo = jwt_settings.ALGORITHM
 access_token_expire_minutes = jwt_settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# Authenticated users are cached by token subject, so most requests skip
+# the users lookup. Kept short because the cache is per process.
+USER_CACHE_TTL = 60
+user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    id: int
+    email: str
+
 def hash_password(pwd:str) -> str:
     return pwd_context.hash(pwd)
 
@@ -39,7 +52,7 @@ def create_token(user_id:int) -> str:
 def decode_token(token:str) -> dict:
     return jwt.decode(token, secret_key, algorithms=[algo])
 
-def get_current_user(token:str = Depends(oauth2_scheme), db:Session = Depends(get_db)) -> User:
+async def get_current_user(token:str = Depends(oauth2_scheme), db:AsyncSession = Depends(get_async_db)) -> AuthenticatedUser:
     try:
         payload = decode_token(token)
         user_id:int = int(payload.get("sub"))
@@ -54,11 +67,18 @@ def get_current_user(token:str = Depends(oauth2_scheme), db:Session = Depends(ge
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+
+    user = (await db.execute(select(User.id, User.email).where(User.id == user_id))).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate":"Bearer"}
         )
-    return user
\ No newline at end of file
+
+    current_user = AuthenticatedUser(id=user.id, email=user.email)
+    user_cache.set(user_id, current_user)
+    return current_user
\ No newline at end of file
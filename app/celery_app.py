@@ -1,6 +1,9 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
+import app.database
 import app.models
+from app.database import configure_worker_engine
 
 celery_app = Celery(
     "detectops",
@@ -18,3 +21,13 @@ celery_app.conf.update(
     enable_utc=True,
     )
 
+
+@worker_process_init.connect
+def init_worker_database(**kwargs):
+    configure_worker_engine()
+
+
+@worker_process_shutdown.connect
+def close_worker_database(**kwargs):
+    # Looked up at call time: configure_worker_engine replaced it
+    app.database.engine.dispose()
@@ -1,14 +1,22 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
-from azure.storage.blob import BlobServiceClient,ContainerClient
-
 class DBSettings(BaseSettings):
     DB_HOST: str
     DB_PORT: str
     DB_USER: str
     DB_PASSWORD: str
     DB_NAME: str
+    # Per engine, so per process: size the pool for API workers x processes
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    # Server-side cap on any one statement, in milliseconds (0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+    # Celery prefork children run one task at a time, so each needs far
+    # fewer connections than an API process
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_WORKER_MAX_OVERFLOW: int = 2
 
     model_config = ConfigDict(env_file="../.env")
 
@@ -19,42 +27,46 @@ class JWTSettings(BaseSettings):
     
     model_config = ConfigDict(env_file="../.env")
 
-class AzureStorageSettings(BaseSettings):
-    AZURE_STORAGE_ENDPOINT: str
-    AZURE_STORAGE_KEY: str
-    AZURE_STORAGE_ACCOUNT_NAME: str
-    AZURE_STORAGE_CONTAINER_NAME: str
-
-    def model_post_init(self, __context):
-            """Runs after BaseSettings loads values — ideal for setup actions."""
-            try:
-                # Build connection string
-                connection_string = (
-                    f"DefaultEndpointsProtocol=https;"
-                    f"AccountName={self.AZURE_STORAGE_ACCOUNT_NAME};"
-                    f"AccountKey={self.AZURE_STORAGE_KEY};"
-                    f"EndpointSuffix=core.windows.net"
-                )
+class PasswordHashSettings(BaseSettings):
+    # bcrypt cost; existing hashes with a different cost are re-hashed on login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash/verify calls allowed to wait for a worker before returning 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
-                client = BlobServiceClient.from_connection_string(connection_string)
-
-                container_client: ContainerClient = client.get_container_client(
-                    self.AZURE_STORAGE_CONTAINER_NAME
-                )
+    model_config = ConfigDict(env_file="../.env")
 
-                if not container_client.exists():
-                    container_client.create_container()
-                    print(f"✔ Azure container '{self.AZURE_STORAGE_CONTAINER_NAME}' created.")
-                else:
-                    print(f"ℹ Azure container '{self.AZURE_STORAGE_CONTAINER_NAME}' already exists.")
+class UploadSettings(BaseSettings):
+    # Shared between the API and the Celery workers; batch uploads are
+    # streamed here and only the file references go through the broker.
+    UPLOAD_SPOOL_DIR: str = "/tmp/detectops/spool"
+    # Parallel blob uploads per batch task, and files per bulk INSERT.
+    BATCH_UPLOAD_CONCURRENCY: int = 8
+    BATCH_UPLOAD_CHUNK_SIZE: int = 50
 
-            except Exception as e:
-                print(f"⚠ Error creating Azure container: {e}")
+    model_config = ConfigDict(env_file="../.env")
 
+class AnnotationQueueSettings(BaseSettings):
+    # How long a claimed image stays reserved for one annotator before it
+    # goes back into the queue.
+    ANNOTATION_CLAIM_SECONDS: int = 600
 
     model_config = ConfigDict(env_file="../.env")
 
+class AzureStorageSettings(BaseSettings):
+    AZURE_STORAGE_ENDPOINT: str
+    AZURE_STORAGE_KEY: str
+    AZURE_STORAGE_ACCOUNT_NAME: str
+    AZURE_STORAGE_CONTAINER_NAME: str
 
+    model_config = ConfigDict(env_file="../.env")
 
+class StorageSettings(BaseSettings):
+    # "azure" or "local"; the local backend needs no external service
+    STORAGE_BACKEND: str = "azure"
+    LOCAL_STORAGE_ROOT: str = "/var/lib/detectops/storage"
+    # Key for the HMAC on local signed URLs, and the URL they point at
+    LOCAL_STORAGE_SECRET: str = ""
+    LOCAL_STORAGE_PUBLIC_URL: str = "http://localhost:8000/storage"
 
-
+    model_config = ConfigDict(env_file="../.env")
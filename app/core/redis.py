@@ -1,8 +1,17 @@
 import redis
+import redis.asyncio
 
 redis_client = redis.Redis(
     host="localhost",
     port=6379,
     db=2,
     decode_responses=True  # important (strings, not bytes)
-)
\ No newline at end of file
+)
+
+# For async routes (SSE); same database as redis_client
+async_redis_client = redis.asyncio.Redis(
+    host="localhost",
+    port=6379,
+    db=2,
+    decode_responses=True
+)
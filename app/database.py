@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.config import DBSettings
@@ -9,9 +12,34 @@ load_dotenv()
 settings = DBSettings()
 
 DATABASE_URL = f"postgresql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+def build_engine(pool_size: int, max_overflow: int):
+    return create_engine(
+        DATABASE_URL,
+        connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
 
-engine = create_engine(DATABASE_URL)
+engine = build_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+# Used by the async routes; a request waiting on the database no longer
+# holds a threadpool slot.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+    **pool_options
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 import app.models 
@@ -20,5 +48,37 @@ def get_db():
     db = SessionLocal()
     try:
         yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def configure_worker_engine() -> None:
+    """
+    Run in each Celery child right after the fork. The pooled connections
+    copied from the parent are dropped without being closed (the parent
+    still owns those sockets), and SessionLocal is rebound to a fresh
+    engine sized for one worker process.
+    """
+    global engine
+    engine.dispose(close=False)
+    engine = build_engine(settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW)
+    SessionLocal.configure(bind=engine)
+
+@contextmanager
+def task_session():
+    """
+    Session for one unit of task work: rolled back if the block raises and
+    always closed, so its connection returns to the worker's pool for the
+    next task.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
\ No newline at end of file
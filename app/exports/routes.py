@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import get_db
+from app.exports.schemas import ExportFormat
+from app.exports.service import stream_export
+from app.projects.ownership import ProjectRef, get_project_for_user
+
+router = APIRouter(prefix="/projects/{project_id}/export", tags=["export"])
+
+@router.get("", status_code=200)
+def export_project(
+    format: ExportFormat = Query(ExportFormat.coco),
+    db: Session = Depends(get_db),
+    project: ProjectRef = Depends(get_project_for_user)
+):
+    # The request session is closed before the body is streamed, so the
+    # generator opens its own on the same engine.
+    session_factory = sessionmaker(bind=db.get_bind(), autocommit=False, autoflush=False)
+    filename = f"project_{project.id}_{format.value}.zip"
+
+    return StreamingResponse(
+        stream_export(session_factory, project.id, format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
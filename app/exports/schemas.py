@@ -0,0 +1,23 @@
+from enum import Enum
+from typing import List, NamedTuple, Optional
+
+class ExportFormat(str, Enum):
+    coco = "coco"
+    yolo = "yolo"
+    voc = "voc"
+
+class ExportBox(NamedTuple):
+    # normalized [0..1], top-left origin, as stored by the annotator
+    x: float
+    y: float
+    w: float
+    h: float
+    tag: str
+
+class ExportImage(NamedTuple):
+    image_id: int
+    filename: str
+    data: bytes
+    width: Optional[int]
+    height: Optional[int]
+    boxes: List[ExportBox]
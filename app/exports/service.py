@@ -0,0 +1,100 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Optional
+
+import zipstream
+from sqlalchemy.orm import Session
+
+from app.annotations.models import Annotation, Tag
+from app.exports.schemas import ExportBox, ExportFormat, ExportImage
+from app.exports.writers import WRITERS
+from app.images.models import Image
+from app.utils.blob_service import download_blob
+from app.utils.image_info import get_image_size
+
+logger = logging.getLogger(__name__)
+
+# Images downloaded ahead of the one being written; bounds export memory
+EXPORT_PREFETCH = 8
+# Rows fetched per round trip from the server-side cursor
+EXPORT_YIELD_PER = 1000
+
+
+def iter_project_annotations(db: Session, project_id: int):
+    """
+    Yield (image_id, filepath, width, height, [ExportBox]) per image from
+    one query on a server-side cursor, so the project is never loaded at once.
+    """
+    rows = (
+        db.query(
+            Image.id, Image.filepath, Image.width, Image.height,
+            Annotation.x, Annotation.y, Annotation.w, Annotation.h, Tag.name.label("tag")
+        )
+        .outerjoin(Annotation, Annotation.image_id == Image.id)
+        .outerjoin(Tag, Tag.id == Annotation.tag_id)
+        .filter(Image.project_id == project_id)
+        .order_by(Image.id, Annotation.id)
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+
+    for key, group in groupby(rows, key=lambda r: (r.id, r.filepath, r.width, r.height)):
+        boxes = [ExportBox(r.x, r.y, r.w, r.h, r.tag) for r in group if r.tag is not None]
+        yield (*key, boxes)
+
+
+def fetch_image(
+    image_id: int, filepath: str, width: Optional[int], height: Optional[int], boxes: list
+) -> ExportImage:
+    data = download_blob(filepath)
+    # Only images ingested before dimensions were stored need the header parsed
+    if width is None:
+        size = get_image_size(data)
+        width, height = size if size else (None, None)
+    return ExportImage(image_id, os.path.basename(filepath), data, width, height, boxes)
+
+
+def stream_export(session_factory, project_id: int, export_format: ExportFormat):
+    """
+    Sync generator of zip bytes. Entries are flushed as soon as each image
+    arrives, while up to EXPORT_PREFETCH downloads run ahead of it.
+    """
+    writer = WRITERS[export_format]()
+    zf = zipstream.ZipFile(mode="w", compression=zipstream.ZIP_STORED, allowZip64=True)
+    errors = []
+    db = session_factory()
+
+    try:
+        with ThreadPoolExecutor(max_workers=EXPORT_PREFETCH) as pool:
+            pending = deque()
+
+            def drain_one():
+                image_id, filepath, future = pending.popleft()
+                try:
+                    writer.add_image(zf, future.result())
+                except Exception as e:
+                    logger.warning("Export skipped image %s: %s", image_id, e)
+                    errors.append(f"{filepath}: {e}")
+
+            for image_id, filepath, width, height, boxes in iter_project_annotations(db, project_id):
+                pending.append((
+                    image_id, filepath,
+                    pool.submit(fetch_image, image_id, filepath, width, height, boxes)
+                ))
+                if len(pending) >= EXPORT_PREFETCH:
+                    drain_one()
+                    yield from zf.flush()
+
+            while pending:
+                drain_one()
+                yield from zf.flush()
+
+        writer.finish(zf)
+        if errors:
+            zf.writestr("export_errors.txt", "\n".join(errors).encode())
+        yield from zf
+    finally:
+        writer.close()
+        db.close()
@@ -0,0 +1,141 @@
+import json
+from abc import ABC, abstractmethod
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+import zipstream
+
+from app.exports.schemas import ExportFormat, ExportImage
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportWriter(ABC):
+    """
+    Adds one image and its labels to the zip at a time. Nothing but the
+    tag -> class id mapping is kept in memory between images.
+    """
+
+    def __init__(self):
+        self.class_ids: dict[str, int] = {}
+
+    def class_id(self, tag: str) -> int:
+        return self.class_ids.setdefault(tag, len(self.class_ids))
+
+    @abstractmethod
+    def add_image(self, zf: zipstream.ZipFile, image: ExportImage) -> None:
+        ...
+
+    def finish(self, zf: zipstream.ZipFile) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def stem(filename: str) -> str:
+    return os.path.splitext(filename)[0]
+
+
+class YoloWriter(ExportWriter):
+    def add_image(self, zf, image):
+        zf.writestr(f"images/{image.filename}", image.data)
+        lines = [
+            f"{self.class_id(b.tag)} {b.x + b.w / 2:.6f} {b.y + b.h / 2:.6f} {b.w:.6f} {b.h:.6f}"
+            for b in image.boxes
+        ]
+        zf.writestr(f"labels/{stem(image.filename)}.txt", "\n".join(lines).encode())
+
+    def finish(self, zf):
+        names = sorted(self.class_ids, key=self.class_ids.get)
+        zf.writestr("classes.txt", "\n".join(names).encode())
+
+
+class VocWriter(ExportWriter):
+    def add_image(self, zf, image):
+        zf.writestr(f"JPEGImages/{image.filename}", image.data)
+        width, height = image.width or 0, image.height or 0
+
+        objects = "".join(
+            "<object>"
+            f"<name>{escape(b.tag)}</name><difficult>0</difficult>"
+            "<bndbox>"
+            f"<xmin>{round(b.x * width)}</xmin><ymin>{round(b.y * height)}</ymin>"
+            f"<xmax>{round((b.x + b.w) * width)}</xmax><ymax>{round((b.y + b.h) * height)}</ymax>"
+            "</bndbox></object>"
+            for b in image.boxes
+        )
+        xml = (
+            "<annotation>"
+            f"<filename>{escape(image.filename)}</filename>"
+            f"<size><width>{width}</width><height>{height}</height><depth>3</depth></size>"
+            f"{objects}"
+            "</annotation>"
+        )
+        zf.writestr(f"Annotations/{stem(image.filename)}.xml", xml.encode())
+
+
+class CocoWriter(ExportWriter):
+    """
+    COCO is a single JSON document, so its "images" and "annotations"
+    arrays are spooled to temp files and streamed into the zip at the end.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.images_file = tempfile.TemporaryFile(mode="w+")
+        self.annotations_file = tempfile.TemporaryFile(mode="w+")
+        self.annotation_id = 0
+
+    def add_image(self, zf, image):
+        zf.writestr(f"images/{image.filename}", image.data)
+        width, height = image.width or 0, image.height or 0
+
+        sep = "," if self.images_file.tell() else ""
+        self.images_file.write(sep + json.dumps({
+            "id": image.image_id,
+            "file_name": image.filename,
+            "width": width,
+            "height": height
+        }))
+
+        for b in image.boxes:
+            self.annotation_id += 1
+            box = [b.x * width, b.y * height, b.w * width, b.h * height]
+            sep = "," if self.annotations_file.tell() else ""
+            self.annotations_file.write(sep + json.dumps({
+                "id": self.annotation_id,
+                "image_id": image.image_id,
+                "category_id": self.class_id(b.tag) + 1,
+                "bbox": [round(v, 2) for v in box],
+                "area": round(box[2] * box[3], 2),
+                "iscrowd": 0
+            }))
+
+    def _read(self, f):
+        f.seek(0)
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk.encode()
+
+    def _document(self):
+        categories = [{"id": cid + 1, "name": tag} for tag, cid in self.class_ids.items()]
+        yield b'{"images":['
+        yield from self._read(self.images_file)
+        yield b'],"annotations":['
+        yield from self._read(self.annotations_file)
+        yield b'],"categories":' + json.dumps(categories).encode() + b"}"
+
+    def finish(self, zf):
+        zf.write_iter("annotations.json", self._document())
+
+    def close(self):
+        self.images_file.close()
+        self.annotations_file.close()
+
+
+WRITERS = {
+    ExportFormat.coco: CocoWriter,
+    ExportFormat.yolo: YoloWriter,
+    ExportFormat.voc: VocWriter,
+}
@@ -1,21 +1,82 @@
+from app.core.local_cache import TTLCache
 from app.core.redis import redis_client
+from app.images.thumbnails import thumbnail_blob_name
 from app.utils.blob_service import generate_signed_url
 
+SIGNED_URL_HOURS = 1
 SIGNED_URL_TTL = 55 * 60  # 55 minutes
 
-def get_signed_url_cached(image):
-    cache_key = f"signed_url:image:{image.id}"
+# A URL read from Redis can be up to SIGNED_URL_TTL old, so the local copy
+# must expire within the remaining SAS lifetime (60 - 55 - 1 min margin).
+LOCAL_SIGNED_URL_TTL = 4 * 60
+LOCAL_SIGNED_URL_MAXSIZE = 10_000
+
+local_signed_urls = TTLCache(maxsize=LOCAL_SIGNED_URL_MAXSIZE, ttl=LOCAL_SIGNED_URL_TTL)
+redis_stats = {"hits": 0, "misses": 0}
+
+def signed_url_cache_key(image_id: int, thumbnail_size: int | None = None) -> str:
+    if thumbnail_size:
+        return f"signed_url:image:{image_id}:thumbnail:{thumbnail_size}"
+    return f"signed_url:image:{image_id}"
+
+def _get_signed_urls(blobs: dict[str, str]) -> dict[str, str]:
+    """
+    Resolve signed URLs for {cache key: blob name}: the in-process cache
+    first, then one MGET for the rest, generating SAS tokens only for the
+    misses and writing them back in one pipeline.
+    """
+    urls = {}
+    remote = []
+    for key in blobs:
+        local_url = local_signed_urls.get(key)
+        if local_url:
+            urls[key] = local_url
+        else:
+            remote.append(key)
+
+    if not remote:
+        return urls
+
+    cached = redis_client.mget(remote)
 
-    cached_url = redis_client.get(cache_key)
-    if cached_url:
-        return cached_url
+    missing = {}
+    for key, cached_url in zip(remote, cached):
+        if cached_url:
+            urls[key] = cached_url
+            local_signed_urls.set(key, cached_url)
+        else:
+            missing[key] = generate_signed_url(blobs[key], hours=SIGNED_URL_HOURS)
 
-    signed_url = generate_signed_url(image.filepath, hours=1)
+    redis_stats["hits"] += len(remote) - len(missing)
+    redis_stats["misses"] += len(missing)
 
-    redis_client.setex(
-        cache_key,
-        SIGNED_URL_TTL,
-        signed_url
-    )
+    if missing:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, signed_url in missing.items():
+            pipe.setex(key, SIGNED_URL_TTL, signed_url)
+            local_signed_urls.set(key, signed_url)
+        pipe.execute()
+        urls.update(missing)
+
+    return urls
+
+def get_signed_urls_cached(images) -> dict[int, str]:
+    urls = _get_signed_urls({signed_url_cache_key(img.id): img.filepath for img in images})
+    return {img.id: urls[signed_url_cache_key(img.id)] for img in images}
+
+def get_thumbnail_urls_cached(images, size: int) -> dict[int, str]:
+    """Signed thumbnail URLs; only pass images whose thumbnails are ready."""
+    urls = _get_signed_urls({
+        signed_url_cache_key(img.id, size): thumbnail_blob_name(img.filepath, size)
+        for img in images
+    })
+    return {img.id: urls[signed_url_cache_key(img.id, size)] for img in images}
+
+def get_signed_url_cached(image):
+    return get_signed_urls_cached([image])[image.id]
 
-    return signed_url
+def get_signed_url_cache_stats() -> dict:
+    return {
+        "local": local_signed_urls.stats(),
+        "redis": dict(redis_stats)
+    }
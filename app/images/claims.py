@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import AnnotationQueueSettings
+from app.images.models import Image
+
+queue_settings = AnnotationQueueSettings()
+
+
+async def claim_next_image(db: AsyncSession, project_id: int) -> Optional[Image]:
+    """
+    Lease the newest unannotated image nobody else holds and commit.
+
+    SKIP LOCKED lets concurrent callers step over the row another
+    transaction is claiming instead of queueing behind it, so each caller
+    gets a different image. The walk follows ix_images_unannotated_queue and
+    only passes over live claims, so it stays cheap however big the project
+    is. A lease that is never released on save simply expires.
+    """
+    now = datetime.now()
+    image = await db.scalar(
+        select(Image)
+        .where(
+            Image.project_id == project_id,
+            Image.is_annotated == False,
+            or_(Image.claimed_until.is_(None), Image.claimed_until < now)
+        )
+        .order_by(Image.uploaded_at.desc(), Image.id.desc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if image is None:
+        return None
+
+    image.claimed_until = now + timedelta(seconds=queue_settings.ANNOTATION_CLAIM_SECONDS)
+    await db.commit()
+    return image
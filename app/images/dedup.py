@@ -0,0 +1,39 @@
+import hashlib
+from typing import BinaryIO, Iterable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.images.models import Image
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+CONTENT_HASH_INDEX = "uq_images_project_id_content_sha256"
+
+
+def sha256_stream(fileobj: BinaryIO) -> str:
+    """Hash a seekable stream in chunks and rewind it for the upload."""
+    digest = hashlib.sha256()
+    while chunk := fileobj.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def find_existing_images(db: Session, project_id: int, hashes: Iterable[str]) -> dict[str, int]:
+    """Map each content hash already stored in the project to its image id."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+
+    rows = (
+        db.query(Image.content_sha256, Image.id)
+        .filter(Image.project_id == project_id, Image.content_sha256.in_(hashes))
+        .all()
+    )
+    return {content_sha256: image_id for content_sha256, image_id in rows}
+
+
+def is_duplicate_content_error(exc: IntegrityError) -> bool:
+    """True when the per-project content hash index rejected the row."""
+    diag = getattr(exc.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == CONTENT_HASH_INDEX
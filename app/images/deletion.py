@@ -0,0 +1,73 @@
+from collections import Counter
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.annotations.models import Annotation
+from app.annotations.tags import adjust_tag_usage, count_image_tags
+from app.images.models import Image
+from app.images.thumbnails import THUMBNAIL_SIZES, thumbnail_blob_name
+from app.projects.stats import bump_project_stats
+
+# Images removed per statement round; bounds statement size and row locks
+IMAGE_DELETE_CHUNK = 1000
+
+
+def delete_images_where(db: Session, project_id: int, *criteria) -> tuple[int, list[str]]:
+    """
+    Delete the project's images matching `criteria` with set-based SQL,
+    IMAGE_DELETE_CHUNK at a time: their annotations and tag uses, then the
+    rows themselves, keeping the project stats in step. Core DELETEs skip
+    the ORM after_delete hook, so no per-image task is queued. Returns the
+    number of images deleted and their blob names (originals and
+    thumbnails), for the caller to queue once the transaction commits.
+    """
+    image_ids = db.scalars(
+        select(Image.id)
+        .where(Image.project_id == project_id, *criteria)
+        .order_by(Image.id)
+        .with_for_update()
+    ).all()
+
+    chunks = [image_ids[start:start + IMAGE_DELETE_CHUNK] for start in range(0, len(image_ids), IMAGE_DELETE_CHUNK)]
+
+    # Release every tag use in one pass: adjust_tag_usage must take all of a
+    # transaction's tag locks at once to keep them in id order
+    chunk_uses = [count_image_tags(db, chunk) for chunk in chunks]
+    released = Counter()
+    for uses in chunk_uses:
+        released.update(uses)
+    adjust_tag_usage(db, {tag_id: -n for tag_id, n in released.items()})
+
+    deleted = 0
+    blob_names = []
+    for chunk, uses in zip(chunks, chunk_uses):
+        boxes = sum(uses.values())
+        db.execute(
+            delete(Annotation)
+            .where(Annotation.image_id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(
+            delete(Image)
+            .where(Image.id.in_(chunk))
+            .returning(Image.filepath, Image.is_annotated, Image.size_bytes, Image.thumbnails_ready)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        deleted += len(rows)
+        bump_project_stats(
+            db,
+            project_id,
+            images=-len(rows),
+            annotated=-sum(1 for row in rows if row.is_annotated),
+            boxes=-boxes,
+            bytes_stored=-sum(row.size_bytes or 0 for row in rows)
+        )
+
+        for row in rows:
+            blob_names.append(row.filepath)
+            if row.thumbnails_ready:
+                blob_names.extend(thumbnail_blob_name(row.filepath, size) for size in THUMBNAIL_SIZES)
+
+    return deleted, blob_names
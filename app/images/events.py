@@ -1,5 +1,6 @@
 from sqlalchemy import event
 from app.images.models import Image
+from app.images.thumbnails import THUMBNAIL_SIZES, thumbnail_blob_name
 from app.tasks.blob_tasks import delete_blob_task
 
 
@@ -7,3 +8,6 @@ from app.tasks.blob_tasks import delete_blob_task
 def enqueue_blob_delete(mapper, connection, target):
     if target.filepath:
         delete_blob_task.delay(target.filepath)
+        if target.thumbnails_ready:
+            for size in THUMBNAIL_SIZES:
+                delete_blob_task.delay(thumbnail_blob_name(target.filepath, size))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime,Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime,Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -10,12 +10,43 @@ class Image(Base):
     id = Column(Integer,primary_key=True, index=True)
     storage_url = Column(String, nullable=False)
     filepath = Column(String, nullable=False)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.now)
     is_annotated = Column(Boolean, default=False,nullable=False)
+    size_bytes = Column(BigInteger)
+    # Parsed from the header at ingest; NULL until backfilled for older rows
+    width = Column(Integer)
+    height = Column(Integer)
+    mime_type = Column(String(32))
+    # Duplicates kept on purpose (allow_duplicates) are stored without a hash
+    content_sha256 = Column(String(64))
+    thumbnails_ready = Column(Boolean, default=False, nullable=False)
+    # Lease on the image while someone annotates it (see app/images/claims.py)
+    claimed_until = Column(DateTime)
     project = relationship("Project",back_populates="images")
     annotations = relationship(
         "Annotation",
         back_populates="image",
-        cascade="all, delete-orphan"
-    )
\ No newline at end of file
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    # Partial indexes matching the listing queries: project filter, queue
+    # predicate and the (uploaded_at, id) keyset order.
+    __table_args__ = (
+        Index(
+            "ix_images_unannotated_queue",
+            project_id, uploaded_at.desc(), id.desc(),
+            postgresql_where=(is_annotated == False)
+        ),
+        Index(
+            "ix_images_annotated_queue",
+            project_id, uploaded_at.desc(), id.desc(),
+            postgresql_where=(is_annotated == True)
+        ),
+        Index(
+            "uq_images_project_id_content_sha256",
+            project_id, content_sha256,
+            unique=True
+        ),
+    )
@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.images.models import Image
+
+
+def encode_cursor(image: Image, direction: str) -> str:
+    raw = json.dumps({"t": image.uploaded_at.isoformat(), "id": image.id, "d": direction})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(data["t"]), int(data["id"]), direction
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate_images(db: AsyncSession, stmt: Select, page: int, page_size: int, cursor: Optional[str]) -> dict:
+    """
+    Keyset pagination over (uploaded_at DESC, id DESC).
+
+    With a cursor every page is an index range scan of page_size + 1 rows,
+    however deep it is. Without one, `page` falls back to OFFSET so older
+    clients keep working; page 1 costs the same either way.
+    """
+    key = tuple_(Image.uploaded_at, Image.id)
+
+    if cursor:
+        uploaded_at, image_id, direction = decode_cursor(cursor)
+        if direction == "next":
+            stmt = stmt.where(key < (uploaded_at, image_id)).order_by(Image.uploaded_at.desc(), Image.id.desc())
+        else:
+            stmt = stmt.where(key > (uploaded_at, image_id)).order_by(Image.uploaded_at.asc(), Image.id.asc())
+        stmt = stmt.limit(page_size + 1)
+    else:
+        direction = "next"
+        stmt = (
+            stmt
+            .order_by(Image.uploaded_at.desc(), Image.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size + 1)
+        )
+
+    rows = list((await db.scalars(stmt)).all())
+
+    has_more = len(rows) > page_size
+    images = rows[:page_size]
+    if direction == "prev":
+        images.reverse()
+
+    if not images:
+        return {"images": [], "next_cursor": None, "prev_cursor": None}
+
+    has_next = has_more if direction == "next" else True
+    has_prev = has_more if direction == "prev" else bool(cursor) or page > 1
+
+    return {
+        "images": images,
+        "next_cursor": encode_cursor(images[-1], "next") if has_next else None,
+        "prev_cursor": encode_cursor(images[0], "prev") if has_prev else None
+    }
@@ -1,48 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Path
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from psycopg2.errors import ForeignKeyViolation
 from datetime import datetime
 import uuid
-from typing import List
+from typing import List, Optional
 
 from celery.result import AsyncResult
 from app.celery_app import celery_app
 from app.tasks.image_tasks import process_batch_upload
+from app.tasks.blob_tasks import delete_blob_task, enqueue_blob_deletes
+from app.tasks.thumbnail_tasks import generate_thumbnails_task
 
-from app.database import get_db
-from app.projects.models import Project
+from app.database import get_db, get_async_db
+from app.projects.ownership import ProjectRef, get_project_for_user, get_project_for_write
 from app.images.models import Image
-from app.images.cache import get_signed_url_cached
-from app.auth.security import get_current_user
-from app.auth.models import User
-from app.images.schemas import ImageResponse, PaginatedImageResponse
+from app.annotations.tags import release_image_tags
+from app.projects.stats import bump_project_stats, get_project_stats
+from app.images.cache import get_signed_url_cached, get_signed_urls_cached, get_thumbnail_urls_cached
+from app.images.thumbnails import THUMBNAIL_SIZES, GALLERY_THUMBNAIL_SIZE
+from app.images.dedup import sha256_stream, find_existing_images, is_duplicate_content_error
+from app.utils.image_info import UNKNOWN_MIME_TYPE, get_stream_info
+from app.images.deletion import delete_images_where
+from app.images.pagination import paginate_images
+from app.images.claims import claim_next_image
+from app.images.staging import stage_upload, remove_staged
+from app.images.schemas import (
+    ImageResponse, PaginatedImageResponse, BulkImageDeleteRequest, BulkImageDeleteResponse
+)
 from app.utils.blob_service import upload_to_blob, generate_signed_url, delete_blob
 
 router = APIRouter(prefix="/projects/{project_id}/images", tags=["images"])
 
-# Dependency to verify project ownership
-def get_project_for_user(project_id: int = Path(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return project
-
 @router.post("/upload/batch", status_code=202)
 async def enqueue_batch_upload(
     files: List[UploadFile],
-    project: Project = Depends(get_project_for_user)
+    allow_duplicates: bool = False,
+    project: ProjectRef = Depends(get_project_for_write)
 ):
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded")
 
+    # Only {filename, path} references go through the broker; the bytes
+    # stay in the spool directory until the worker has uploaded them.
     payload = []
-    for file in files:
-        content = await file.read()
-        payload.append({
-            "filename": file.filename,
-            "data": content.decode("latin1")
-        })
+    try:
+        for file in files:
+            payload.append(await stage_upload(file, project.id))
 
-    task = process_batch_upload.delay(payload, project.id)
+        task = process_batch_upload.delay(payload, project.id, allow_duplicates=allow_duplicates)
+    except Exception:
+        for staged in payload:
+            remove_staged(staged["path"])
+        raise
 
     return {
         "message": "Batch upload is being processed",
@@ -51,16 +64,29 @@ async def enqueue_batch_upload(
     }
 
 @router.post("/upload", response_model=ImageResponse, status_code=201)
-async def upload_image(
+def upload_image(
     file: UploadFile,
+    response: Response,
+    allow_duplicates: bool = False,
     db: Session = Depends(get_db),
-    project: Project = Depends(get_project_for_user)
+    project: ProjectRef = Depends(get_project_for_write)
 ):
-    contents = await file.read()
+    # Sync route so FastAPI runs it in the threadpool: the blob upload and
+    # DB calls no longer block the event loop. The body is streamed from
+    # Starlette's spooled temp file instead of being read into memory.
+    content_sha256 = sha256_stream(file.file)
+    existing_id = find_existing_images(db, project.id, [content_sha256]).get(content_sha256)
+
+    # Same content already in the project: skip the blob write entirely
+    if existing_id and not allow_duplicates:
+        response.status_code = 200
+        return get_existing_image(db, existing_id)
+
+    info = get_stream_info(file.file)
     blob_name = f"{project.id}/{uuid.uuid4()}_{file.filename}"
 
     try:
-        upload_to_blob(blob_name, contents)
+        upload_to_blob(blob_name, file.file)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to upload image to blob storage")
 
@@ -71,75 +97,118 @@ async def upload_image(
         storage_url=signed_url,
         project_id=project.id,
         uploaded_at=datetime.now(),
-        is_annotated=False
+        is_annotated=False,
+        size_bytes=file.size,
+        width=info.width if info else None,
+        height=info.height if info else None,
+        mime_type=info.mime_type if info else UNKNOWN_MIME_TYPE,
+        content_sha256=None if existing_id else content_sha256
     )
     db.add(new_image)
-    db.commit()
+    try:
+        bump_project_stats(db, project.id, images=1, bytes_stored=file.size or 0)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        delete_blob_task.delay(blob_name)
+        # The project row went away during the upload (deleted and purged)
+        if isinstance(e.orig, ForeignKeyViolation):
+            raise HTTPException(status_code=404, detail="Project not found")
+        # Lost a race with an identical upload: keep theirs
+        existing_id = None
+        if is_duplicate_content_error(e):
+            existing_id = find_existing_images(db, project.id, [content_sha256]).get(content_sha256)
+        if not existing_id:
+            raise
+        response.status_code = 200
+        return get_existing_image(db, existing_id)
     db.refresh(new_image)
+    generate_thumbnails_task.delay(new_image.id)
 
     return new_image
 
-@router.get("/", status_code=200, response_model=PaginatedImageResponse)
-def get_project_images(
-    page: int = 1,
-    page_size: int = 10,
-    db: Session = Depends(get_db),
-    project: Project = Depends(get_project_for_user)
-):
-    offset = (page - 1) * page_size
+def get_existing_image(db: Session, image_id: int) -> Image:
+    image = db.get(Image, image_id)
+    image.storage_url = get_signed_url_cached(image)
+    return image
 
-    total = db.query(Image).filter(Image.project_id == project.id, Image.is_annotated == False).count()
+async def list_images(
+    db: AsyncSession,
+    project: ProjectRef,
+    is_annotated: bool,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    include_total: bool,
+    thumbnail_size: int
+) -> dict:
+    if thumbnail_size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail="Unsupported thumbnail size")
 
-    images = (
-        db.query(Image)
-        .filter(Image.project_id == project.id, Image.is_annotated == False)
-        .order_by(Image.uploaded_at.desc())
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+    stmt = select(Image).where(Image.project_id == project.id, Image.is_annotated == is_annotated)
 
-    for img in images:
-        img.storage_url = get_signed_url_cached(img)
+    result = await paginate_images(db, stmt, page, page_size, cursor)
 
-    return {
-        "images": images,
-        "total": total
-    }
+    # Redis and SAS signing are blocking calls; keep them off the event loop
+    signed_urls = await run_in_threadpool(get_signed_urls_cached, result["images"])
+    ready = [img for img in result["images"] if img.thumbnails_ready]
+    thumbnail_urls = await run_in_threadpool(get_thumbnail_urls_cached, ready, thumbnail_size) if ready else {}
+    for img in result["images"]:
+        img.storage_url = signed_urls[img.id]
+        img.thumbnail_url = thumbnail_urls.get(img.id, img.storage_url)
 
-@router.get("/annotated", status_code=200, response_model=PaginatedImageResponse)
-def get_project_annotated_images(
-    page: int = 1,
-    page_size: int = 10,
-    db: Session = Depends(get_db),
-    project: Project = Depends(get_project_for_user)
-):
-    offset = (page - 1) * page_size
+    if include_total:
+        # Read from the maintained project stats instead of COUNT(*)
+        stats = await db.run_sync(get_project_stats, project.id)
+        result["total"] = stats.annotated_images if is_annotated else stats.total_images - stats.annotated_images
 
-    total = db.query(Image).filter(Image.project_id == project.id, Image.is_annotated == True).count()
+    return result
 
-    images = (
-        db.query(Image)
-        .filter(Image.project_id == project.id, Image.is_annotated == True)
-        .order_by(Image.uploaded_at.desc())
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+@router.get("/", status_code=200, response_model=PaginatedImageResponse)
+async def get_project_images(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    thumbnail_size: int = GALLERY_THUMBNAIL_SIZE,
+    db: AsyncSession = Depends(get_async_db),
+    project: ProjectRef = Depends(get_project_for_user)
+):
+    return await list_images(db, project, False, page, page_size, cursor, include_total, thumbnail_size)
+
+@router.get("/annotated", status_code=200, response_model=PaginatedImageResponse)
+async def get_project_annotated_images(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    thumbnail_size: int = GALLERY_THUMBNAIL_SIZE,
+    db: AsyncSession = Depends(get_async_db),
+    project: ProjectRef = Depends(get_project_for_user)
+):
+    return await list_images(db, project, True, page, page_size, cursor, include_total, thumbnail_size)
 
-    for img in images:
-        img.storage_url = get_signed_url_cached(img)
+@router.post("/next", status_code=200, response_model=ImageResponse)
+async def claim_next_image_to_annotate(
+    db: AsyncSession = Depends(get_async_db),
+    project: ProjectRef = Depends(get_project_for_write)
+):
+    """
+    Hand out the next unannotated image and lease it to the caller, so
+    parallel annotators never get the same one. 204 once the queue is empty.
+    """
+    image = await claim_next_image(db, project.id)
+    if image is None:
+        return Response(status_code=204)
 
-    return {
-        "images": images,
-        "total": total
-    }
+    image.storage_url = await run_in_threadpool(get_signed_url_cached, image)
+    return image
 
 @router.get("/{image_id}", status_code=200, response_model=ImageResponse)
 def get_image(
     image_id: int,
     db: Session = Depends(get_db),
-    project: Project = Depends(get_project_for_user)
+    project: ProjectRef = Depends(get_project_for_user)
 ):
     image = db.query(Image).filter(Image.id == image_id, Image.project_id == project.id).first()
 
@@ -150,21 +219,56 @@ def get_image(
 
     return image
 
+@router.post("/bulk-delete", status_code=200, response_model=BulkImageDeleteResponse)
+def bulk_delete_images(
+    request: BulkImageDeleteRequest,
+    db: Session = Depends(get_db),
+    project: ProjectRef = Depends(get_project_for_write)
+):
+    criteria = []
+    if request.image_ids is not None:
+        criteria.append(Image.id.in_(request.image_ids))
+    if request.is_annotated is not None:
+        criteria.append(Image.is_annotated == request.is_annotated)
+
+    # Never read an empty request as "delete everything"
+    if not criteria:
+        raise HTTPException(status_code=400, detail="Provide image_ids or a filter")
+
+    deleted, blob_names = delete_images_where(db, project.id, *criteria)
+    db.commit()
+
+    enqueue_blob_deletes(blob_names)
+
+    return {"deleted": deleted}
+
 @router.delete("/{image_id}", status_code=204)
 def delete_image(
     image_id: int,
     db: Session = Depends(get_db),
-    project: Project = Depends(get_project_for_user)
+    project: ProjectRef = Depends(get_project_for_write)
 ):
+    # Locked like the annotation writes: is_annotated and the boxes released
+    # must not change under a concurrent save before the row is gone
     image = (
         db.query(Image)
         .filter(Image.id == image_id, Image.project_id == project.id)
+        .with_for_update()
         .first()
     )
 
     if not image:
         raise HTTPException(status_code=404, detail="Image not found in this project")
 
+    boxes = release_image_tags(db, [image.id])
+    bump_project_stats(
+        db,
+        project.id,
+        images=-1,
+        annotated=-1 if image.is_annotated else 0,
+        boxes=-boxes,
+        bytes_stored=-(image.size_bytes or 0)
+    )
     db.delete(image)
     db.commit()
 
@@ -1,16 +1,34 @@
 from pydantic import BaseModel,ConfigDict
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class ImageResponse(BaseModel):
     id: int
     filepath: str
     storage_url:str
+    # Falls back to storage_url until the thumbnail task has run
+    thumbnail_url: Optional[str] = None
     uploaded_at: datetime
+    width: Optional[int] = None
+    height: Optional[int] = None
+    mime_type: Optional[str] = None
+    size_bytes: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkImageDeleteRequest(BaseModel):
+    # Either explicit ids, a filter, or both (ids narrowed by the filter)
+    image_ids: Optional[List[int]] = None
+    is_annotated: Optional[bool] = None
+
+
+class BulkImageDeleteResponse(BaseModel):
+    deleted: int
+
+
 class PaginatedImageResponse(BaseModel):
     images: List[ImageResponse]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
\ No newline at end of file
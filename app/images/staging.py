@@ -0,0 +1,48 @@
+import hashlib
+import os
+import uuid
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import UploadSettings
+
+from dotenv import load_dotenv
+load_dotenv()
+
+upload_settings = UploadSettings()
+
+SPOOL_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def _copy_to_spool(src, path: str) -> str:
+    """Copy in chunks, hashing on the way so the worker can dedupe."""
+    digest = hashlib.sha256()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as dst:
+        while chunk := src.read(SPOOL_CHUNK_SIZE):
+            digest.update(chunk)
+            dst.write(chunk)
+    return digest.hexdigest()
+
+
+async def stage_upload(file: UploadFile, project_id: int) -> dict:
+    """
+    Stream an uploaded file into the spool directory in fixed-size chunks
+    and return a small reference that can be sent through the broker.
+    """
+    path = os.path.join(upload_settings.UPLOAD_SPOOL_DIR, str(project_id), uuid.uuid4().hex)
+    sha256 = await run_in_threadpool(_copy_to_spool, file.file, path)
+
+    return {
+        "filename": file.filename,
+        "path": path,
+        "sha256": sha256
+    }
+
+
+def remove_staged(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
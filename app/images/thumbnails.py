@@ -0,0 +1,38 @@
+import io
+
+from PIL import Image as PILImage, ImageOps
+
+THUMBNAIL_SIZES = (256, 1024)
+GALLERY_THUMBNAIL_SIZE = 256
+THUMBNAIL_QUALITY = 80
+
+
+def thumbnail_blob_name(filepath: str, size: int) -> str:
+    """Derive the thumbnail path, kept under the image's project prefix."""
+    project_dir, _, name = filepath.rpartition("/")
+    return f"{project_dir}/thumbnails/{size}/{name}.webp"
+
+
+def render_thumbnails(data: bytes, sizes=THUMBNAIL_SIZES) -> dict[int, bytes]:
+    """
+    Downscale an original into WebP thumbnails that fit in size x size.
+    Sizes are rendered largest first so each one is resized from the
+    previous result rather than from the full-resolution original.
+    """
+    largest = max(sizes)
+    thumbnails = {}
+
+    with PILImage.open(io.BytesIO(data)) as source:
+        # Lets JPEG decode at a reduced scale instead of at full resolution
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+        for size in sorted(sizes, reverse=True):
+            image.thumbnail((size, size), PILImage.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=THUMBNAIL_QUALITY)
+            thumbnails[size] = buffer.getvalue()
+
+    return thumbnails
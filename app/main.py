@@ -5,6 +5,12 @@ from app.images.routes import router as images_router
 from app.annotations.routes import router as annotations_router
 from app.projects.routes import router as projects_router
 from app.tasks.routes import router as tasks_router
+from app.exports.routes import router as exports_router
+from app.storage.routes import router as storage_router
+from app.storage import get_storage
+from app.images.cache import get_signed_url_cache_stats
+from app.auth.hashing import password_hasher
+from app.database import async_engine
 
 app = FastAPI()
 
@@ -13,8 +19,29 @@ app.include_router(images_router)
 app.include_router(annotations_router)
 app.include_router(projects_router)
 app.include_router(tasks_router)
+app.include_router(exports_router)
+app.include_router(storage_router)
+
+@app.on_event("startup")
+def prepare_storage():
+    get_storage().prepare()
+
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the FastAPI application!"}
 
+@app.get("/cache/stats")
+def read_cache_stats():
+    return {"signed_urls": get_signed_url_cache_stats()}
@@ -1,6 +1,6 @@
 from app.auth.models import User
 from app.projects.models import Project
 from app.images.models import Image
-from app.annotations.models import Annotation
+from app.annotations.models import Annotation, Tag
 
 import app.images.events
\ No newline at end of file
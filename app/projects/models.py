@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -11,6 +11,29 @@ class Project(Base):
     description = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.now)
+    # Set when deletion is requested; the rows go in the background purge
+    deleted_at = Column(DateTime)
 
     owner = relationship("User", back_populates="projects")
-    images = relationship("Image", back_populates="project", cascade="all, delete-orphan")
+    images = relationship("Image", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    tags = relationship("Tag", cascade="all, delete-orphan", passive_deletes=True)
+    stats = relationship(
+        "ProjectStats",
+        uselist=False,
+        lazy="joined",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+class ProjectStats(Base):
+    """
+    Running totals for a project, kept up to date in the same transaction
+    as the image and annotation writes (see app/projects/stats.py).
+    """
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    total_images = Column(Integer, nullable=False, default=0)
+    annotated_images = Column(Integer, nullable=False, default=0)
+    total_boxes = Column(Integer, nullable=False, default=0)
+    bytes_stored = Column(BigInteger, nullable=False, default=0)
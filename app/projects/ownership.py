@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException, Path
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.security import get_current_user, AuthenticatedUser
+from app.core.local_cache import TTLCache
+from app.database import get_async_db
+from app.projects.models import Project
+
+# (user_id, project_id) -> ProjectRef. Only successful lookups are cached.
+# invalidate_project() only reaches the current process, so another API
+# worker can keep authorizing reads of a deleted project for up to the TTL;
+# write paths use get_project_for_write, which always asks the database.
+OWNERSHIP_CACHE_TTL = 30
+ownership_cache = TTLCache(maxsize=10_000, ttl=OWNERSHIP_CACHE_TTL)
+
+@dataclass(frozen=True)
+class ProjectRef:
+    id: int
+    user_id: int
+
+def invalidate_project(project_id: int, user_id: int) -> None:
+    ownership_cache.delete((user_id, project_id))
+
+async def load_project(db: AsyncSession, user_id: int, project_id: int) -> ProjectRef:
+    row = (await db.execute(
+        select(Project.id, Project.user_id)
+        .where(Project.id == project_id, Project.user_id == user_id, Project.deleted_at.is_(None))
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    project = ProjectRef(id=row.id, user_id=row.user_id)
+    ownership_cache.set((user_id, project_id), project)
+    return project
+
+# Dependency to verify project ownership
+async def get_project_for_user(
+    project_id: int = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> ProjectRef:
+    """
+    Ownership check for read paths. Served from the per-process cache, so a
+    project deleted through another worker stays readable here for up to
+    OWNERSHIP_CACHE_TTL seconds.
+    """
+    project = ownership_cache.get((current_user.id, project_id))
+    if project is not None:
+        return project
+    return await load_project(db, current_user.id, project_id)
+
+async def get_project_for_write(
+    project_id: int = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> ProjectRef:
+    """
+    Ownership check for write paths. Always reads the project row, so no
+    worker writes into a project another worker has just deleted; the
+    result still refreshes the cache for later reads.
+    """
+    return await load_project(db, current_user.id, project_id)
@@ -1,40 +1,60 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
 
 from app.database import get_db
-from app.projects.models import Project
-from app.projects.schemas import ProjectCreate, Project as ProjectSchema
-from app.auth.security import get_current_user
-from app.auth.models import User
+from app.projects.models import Project, ProjectStats
+from app.projects.schemas import ProjectCreate, Project as ProjectSchema, ProjectStats as ProjectStatsSchema
+from app.auth.security import get_current_user, AuthenticatedUser
+from app.projects.ownership import ProjectRef, get_project_for_user, invalidate_project
+from app.projects.stats import get_project_stats
+from app.tasks.project_tasks import purge_project_task
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 @router.post("/", response_model=ProjectSchema, status_code=201)
-def create_project(project: ProjectCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_project(project: ProjectCreate, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     new_project = Project(**project.model_dump(), user_id=current_user.id)
+    new_project.stats = ProjectStats(total_images=0, annotated_images=0, total_boxes=0, bytes_stored=0)
     db.add(new_project)
     db.commit()
     db.refresh(new_project)
     return new_project
 
 @router.get("/", response_model=List[ProjectSchema])
-def get_projects(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(Project).filter(Project.user_id == current_user.id).all()
+def get_projects(db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    # Project.stats is joined-eager, so the stats come in the same query
+    return db.query(Project).filter(Project.user_id == current_user.id, Project.deleted_at.is_(None)).all()
+
+@router.get("/{project_id}/stats", response_model=ProjectStatsSchema)
+def get_stats(project: ProjectRef = Depends(get_project_for_user), db: Session = Depends(get_db)):
+    return get_project_stats(db, project.id)
 
 @router.get("/{project_id}", response_model=ProjectSchema)
-def get_project(project_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+def get_project(project_id: int, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    project = (
+        db.query(Project)
+        .filter(Project.id == project_id, Project.user_id == current_user.id, Project.deleted_at.is_(None))
+        .first()
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 @router.delete("/{project_id}", status_code=204)
-def delete_project(project_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
-    if not project:
+def delete_project(project_id: int, db: Session = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    # Only mark it here; loading a large project's images to cascade the
+    # delete through the ORM is what made this time out.
+    marked = db.execute(
+        update(Project)
+        .where(Project.id == project_id, Project.user_id == current_user.id, Project.deleted_at.is_(None))
+        .values(deleted_at=datetime.now())
+    ).rowcount
+    if not marked:
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    # The cascade delete in the model should handle deleting associated images.
-    db.delete(project)
     db.commit()
+    invalidate_project(project_id, current_user.id)
+
+    purge_project_task.delay(project_id)
@@ -8,9 +8,18 @@ class ProjectBase(BaseModel):
 class ProjectCreate(ProjectBase):
     pass
 
+class ProjectStats(BaseModel):
+    total_images: int = 0
+    annotated_images: int = 0
+    total_boxes: int = 0
+    bytes_stored: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
 class Project(ProjectBase):
     id: int
     user_id: int
     created_at: datetime
+    stats: ProjectStats | None = None
 
     model_config = ConfigDict(from_attributes=True)
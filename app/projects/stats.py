@@ -0,0 +1,50 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.projects.models import ProjectStats
+
+
+def bump_project_stats(
+    db: Session,
+    project_id: int,
+    images: int = 0,
+    annotated: int = 0,
+    boxes: int = 0,
+    bytes_stored: int = 0
+) -> None:
+    """
+    Apply deltas to a project's running totals. Runs in the caller's
+    transaction as one atomic upsert, so concurrent writers never lose an
+    update and a missing row is created on first use.
+    """
+    if not (images or annotated or boxes or bytes_stored):
+        return
+
+    stmt = insert(ProjectStats).values(
+        project_id=project_id,
+        total_images=images,
+        annotated_images=annotated,
+        total_boxes=boxes,
+        bytes_stored=bytes_stored
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProjectStats.project_id],
+        set_={
+            "total_images": ProjectStats.total_images + stmt.excluded.total_images,
+            "annotated_images": ProjectStats.annotated_images + stmt.excluded.annotated_images,
+            "total_boxes": ProjectStats.total_boxes + stmt.excluded.total_boxes,
+            "bytes_stored": ProjectStats.bytes_stored + stmt.excluded.bytes_stored,
+        }
+    )
+    db.execute(stmt)
+
+
+def get_project_stats(db: Session, project_id: int) -> ProjectStats:
+    stats = db.get(ProjectStats, project_id)
+    return stats or ProjectStats(
+        project_id=project_id,
+        total_images=0,
+        annotated_images=0,
+        total_boxes=0,
+        bytes_stored=0
+    )
@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+from app.config import StorageSettings
+from app.storage.base import StorageBackend
+
+from dotenv import load_dotenv
+load_dotenv()
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """The configured backend, built on first use rather than at import."""
+    settings = StorageSettings()
+
+    if settings.STORAGE_BACKEND == "local":
+        from app.storage.local_disk import LocalDiskStorage
+        return LocalDiskStorage(settings)
+
+    if settings.STORAGE_BACKEND == "azure":
+        from app.config import AzureStorageSettings
+        from app.storage.azure_blob import AzureBlobStorage
+        return AzureBlobStorage(AzureStorageSettings())
+
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
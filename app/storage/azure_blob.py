@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterator
+
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
+
+from app.config import AzureStorageSettings
+from app.storage.base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+# Streams larger than one block are sent as staged blocks, so an upload
+# never holds more than BLOB_BLOCK_SIZE * BLOB_MAX_CONCURRENCY in memory.
+BLOB_BLOCK_SIZE = 4 * 1024 * 1024
+BLOB_MAX_CONCURRENCY = 2
+# Sub-requests allowed in one Blob Batch call
+BLOB_BATCH_SIZE = 256
+
+
+class AzureBlobStorage(StorageBackend):
+    def __init__(self, settings: AzureStorageSettings):
+        self.settings = settings
+        connection_string = (
+            f"DefaultEndpointsProtocol=https;AccountName={settings.AZURE_STORAGE_ACCOUNT_NAME};AccountKey={settings.AZURE_STORAGE_KEY};EndpointSuffix=core.windows.net"
+        )
+        # Building the client is offline; the first request opens the connection
+        self.service_client = BlobServiceClient.from_connection_string(
+            connection_string,
+            max_single_put_size=BLOB_BLOCK_SIZE,
+            max_block_size=BLOB_BLOCK_SIZE
+        )
+        self.container_client = self.service_client.get_container_client(settings.AZURE_STORAGE_CONTAINER_NAME)
+
+    def prepare(self) -> None:
+        try:
+            self.container_client.create_container()
+            logger.info("Azure container '%s' created", self.settings.AZURE_STORAGE_CONTAINER_NAME)
+        except ResourceExistsError:
+            pass
+        except Exception as e:
+            logger.warning("Could not create Azure container: %s", e)
+
+    def upload(self, name: str, data: bytes | BinaryIO) -> None:
+        self.container_client.upload_blob(
+            name=name,
+            data=data,
+            overwrite=True,
+            max_concurrency=BLOB_MAX_CONCURRENCY
+        )
+
+    def download_stream(self, name: str, offset: int = 0, length: int | None = None) -> Iterator[bytes]:
+        yield from self.container_client.download_blob(name, offset=offset, length=length).chunks()
+
+    def download(self, name: str) -> bytes:
+        return self.container_client.download_blob(name, max_concurrency=BLOB_MAX_CONCURRENCY).readall()
+
+    def read_header(self, name: str, length: int) -> tuple[bytes, int]:
+        downloader = self.container_client.download_blob(name, offset=0, length=length)
+        data = downloader.readall()
+        # content_range is "bytes <start>-<end>/<total>"
+        return data, int(downloader.properties.content_range.rsplit("/", 1)[1])
+
+    def delete(self, name: str) -> None:
+        self.container_client.delete_blob(name)
+
+    def delete_many(self, names: list[str]) -> None:
+        for start in range(0, len(names), BLOB_BATCH_SIZE):
+            # One Blob Batch request; missing blobs are not an error here
+            self.container_client.delete_blobs(
+                *names[start:start + BLOB_BATCH_SIZE],
+                raise_on_any_failure=False
+            )
+
+    def signed_url(self, name: str, expires_in: timedelta) -> str:
+        settings = self.settings
+        sas_token = generate_blob_sas(
+            account_name=settings.AZURE_STORAGE_ACCOUNT_NAME,
+            container_name=settings.AZURE_STORAGE_CONTAINER_NAME,
+            blob_name=name,
+            account_key=settings.AZURE_STORAGE_KEY,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.now() + expires_in
+        )
+        return f"https://{settings.AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_STORAGE_CONTAINER_NAME}/{name}?{sas_token}"
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            yield blob.name
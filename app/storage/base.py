@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import BinaryIO, Iterator
+
+
+class StorageBackend(ABC):
+    """
+    Where image blobs live. Names are "/"-separated paths such as
+    "{project_id}/{uuid}_{filename}"; backends map them onto their store.
+    """
+
+    def prepare(self) -> None:
+        """Create the container/directory if needed. Called once at startup."""
+
+    @abstractmethod
+    def upload(self, name: str, data: bytes | BinaryIO) -> None:
+        ...
+
+    @abstractmethod
+    def download_stream(self, name: str, offset: int = 0, length: int | None = None) -> Iterator[bytes]:
+        """Yield the blob (or the requested byte range) in chunks."""
+
+    def download(self, name: str) -> bytes:
+        return b"".join(self.download_stream(name))
+
+    @abstractmethod
+    def read_header(self, name: str, length: int) -> tuple[bytes, int]:
+        """Return the first `length` bytes and the full blob size."""
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        ...
+
+    def delete_many(self, names: list[str]) -> None:
+        """Delete several blobs, ignoring ones that are already gone."""
+        for name in names:
+            self.delete(name)
+
+    @abstractmethod
+    def signed_url(self, name: str, expires_in: timedelta) -> str:
+        """A URL a browser can GET without credentials until it expires."""
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """Yield the names of all blobs starting with prefix."""
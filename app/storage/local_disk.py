@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from urllib.parse import quote, urlencode
+
+from app.config import StorageSettings
+from app.storage.base import StorageBackend
+
+LOCAL_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class LocalDiskStorage(StorageBackend):
+    """
+    Blobs as files under a root directory. Signed URLs point at the
+    /storage route, which checks an HMAC over the name and expiry.
+    """
+
+    def __init__(self, settings: StorageSettings):
+        if not settings.LOCAL_STORAGE_SECRET:
+            raise ValueError("LOCAL_STORAGE_SECRET must be set for the local storage backend")
+        self.root = Path(settings.LOCAL_STORAGE_ROOT).resolve()
+        self.secret = settings.LOCAL_STORAGE_SECRET.encode()
+        self.public_url = settings.LOCAL_STORAGE_PUBLIC_URL.rstrip("/")
+
+    def path_for(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        # Reject names like "../../etc/passwd"
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Invalid blob name: {name}")
+        return path
+
+    def prepare(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def upload(self, name: str, data: bytes | BinaryIO) -> None:
+        path = self.path_for(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write next to the target and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                if isinstance(data, bytes):
+                    dst.write(data)
+                else:
+                    shutil.copyfileobj(data, dst, LOCAL_CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def download_stream(self, name: str, offset: int = 0, length: int | None = None) -> Iterator[bytes]:
+        with open(self.path_for(name), "rb") as src:
+            src.seek(offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = src.read(LOCAL_CHUNK_SIZE if remaining is None else min(LOCAL_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def read_header(self, name: str, length: int) -> tuple[bytes, int]:
+        path = self.path_for(name)
+        with open(path, "rb") as src:
+            return src.read(length), os.fstat(src.fileno()).st_size
+
+    def delete(self, name: str) -> None:
+        self.path_for(name).unlink()
+
+    def delete_many(self, names: list[str]) -> None:
+        for name in names:
+            self.path_for(name).unlink(missing_ok=True)
+
+    def sign(self, name: str, expires: int) -> str:
+        message = f"{name}\n{expires}".encode()
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def verify(self, name: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.sign(name, expires), signature)
+
+    def signed_url(self, name: str, expires_in: timedelta) -> str:
+        expires = int(time.time() + expires_in.total_seconds())
+        query = urlencode({"expires": expires, "signature": self.sign(name, expires)})
+        return f"{self.public_url}/{quote(name)}?{query}"
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        # Only walk the directory the prefix points into
+        base = self.root / prefix.rpartition("/")[0]
+        if not base.is_dir() or not base.resolve().is_relative_to(self.root):
+            return
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.startswith(".upload-"):
+                    continue
+                name = Path(dirpath, filename).relative_to(self.root).as_posix()
+                if name.startswith(prefix):
+                    yield name
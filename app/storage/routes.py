@@ -0,0 +1,35 @@
+import mimetypes
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.storage import get_storage
+from app.storage.local_disk import LocalDiskStorage
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+
+@router.get("/{name:path}")
+def serve_blob(name: str, expires: int, signature: str):
+    """
+    Target of LocalDiskStorage signed URLs. FileResponse hands the file to
+    the server's sendfile path where available instead of copying it
+    through Python.
+    """
+    storage = get_storage()
+    if not isinstance(storage, LocalDiskStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not storage.verify(name, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    try:
+        path = storage.path_for(name)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Not found")
+
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return FileResponse(path, media_type=media_type)
@@ -1,5 +1,10 @@
+from typing import Iterable
+
 from app.celery_app import celery_app
-from app.utils.blob_service import delete_blob
+from app.utils.blob_service import delete_blob, delete_blobs
+
+# Blob names per delete_blobs_task; matches one storage batch request
+BLOB_DELETE_CHUNK = 256
 
 
 @celery_app.task(
@@ -9,3 +14,20 @@ from app.utils.blob_service import delete_blob
 )
 def delete_blob_task(filepath: str):
     delete_blob(filepath)
+
+
+@celery_app.task(
+    name="delete_blobs_task",
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 5, "countdown": 10},
+)
+def delete_blobs_task(filepaths: list):
+    delete_blobs(filepaths)
+
+
+def enqueue_blob_deletes(filepaths: Iterable[str]) -> int:
+    """Queue deletion of many blobs as one task per chunk. Returns the task count."""
+    filepaths = list(filepaths)
+    for start in range(0, len(filepaths), BLOB_DELETE_CHUNK):
+        delete_blobs_task.delay(filepaths[start:start + BLOB_DELETE_CHUNK])
+    return -(-len(filepaths) // BLOB_DELETE_CHUNK)
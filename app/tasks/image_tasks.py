@@ -1,74 +1,264 @@
+import logging
+import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
 import app.models
 
 from app.celery_app import celery_app
-from app.database import SessionLocal
+from app.database import task_session
 from app.images.models import Image
-from app.utils.blob_service import upload_to_blob, generate_signed_url,delete_blob
+from app.images.dedup import find_existing_images
+from app.images.staging import remove_staged, upload_settings
+from app.tasks.blob_tasks import delete_blob_task
+from app.tasks.thumbnail_tasks import generate_thumbnails_task
+from app.tasks.progress import ProgressReporter
+from app.projects.stats import bump_project_stats
+from app.utils.blob_service import upload_to_blob, generate_signed_url,delete_blob, download_blob_header
+from app.utils.image_info import HEADER_BYTES, UNKNOWN_MIME_TYPE, get_image_info, get_stream_info
 
+logger = logging.getLogger(__name__)
 
-@celery_app.task(name="process_batch_upload", bind=True)
-def process_batch_upload(self, files: list, project_id: int):
-    db = SessionLocal()
+IMAGE_INFO_BACKFILL_BATCH = 500
+
+
+def _upload_staged_file(file: dict, project_id: int) -> dict:
+    """Upload one spooled file to blob storage. Runs on the upload pool."""
+    blob_name = f"{project_id}/{uuid.uuid4()}_{file['filename']}"
+
+    try:
+        size = os.path.getsize(file["path"])
+        with open(file["path"], "rb") as contents:
+            info = get_stream_info(contents)
+            upload_to_blob(blob_name, contents)
+    finally:
+        remove_staged(file["path"])
+
+    return {
+        "filename": file["filename"],
+        "filepath": blob_name,
+        "url": generate_signed_url(blob_name),
+        "size": size,
+        "sha256": file.get("sha256"),
+        "width": info.width if info else None,
+        "height": info.height if info else None,
+        "mime_type": info.mime_type if info else UNKNOWN_MIME_TYPE
+    }
 
+
+@celery_app.task(name="process_batch_upload", bind=True)
+def process_batch_upload(self, files: list, project_id: int, allow_duplicates: bool = False):
     results = []
     failures = []
+    duplicates = []
+    # content hash -> id of the stored image
+    known = {}
     total = len(files)
+    progress = ProgressReporter(self, total)
+    chunk_size = upload_settings.BATCH_UPLOAD_CHUNK_SIZE
+
+    with task_session() as db:
+        try:
+            with ThreadPoolExecutor(max_workers=upload_settings.BATCH_UPLOAD_CONCURRENCY) as pool:
+                queue = list(files)
+                while queue:
+                    chunk, queue = queue[:chunk_size], queue[chunk_size:]
+                    known.update(find_existing_images(
+                        db, project_id, [file["sha256"] for file in chunk if file.get("sha256")]
+                    ))
+
+                    # Drop duplicates of stored content before they cost a blob upload
+                    pending = []
+                    in_flight = set()
+                    deferred = []
+                    for file in chunk:
+                        sha256 = file.get("sha256")
+                        if sha256 and (sha256 in known or sha256 in in_flight):
+                            if not allow_duplicates:
+                                if sha256 in known:
+                                    remove_staged(file["path"])
+                                    duplicates.append(file)
+                                    progress.advance(message=f"Skipped duplicate {file['filename']}")
+                                else:
+                                    # Another copy is uploading in this chunk. Keep this one
+                                    # staged until that copy is stored, in case it fails.
+                                    deferred.append(file)
+                                continue
+                            # Kept on purpose: store without a hash so the unique index allows it
+                            file = {**file, "sha256": None}
+                        elif sha256:
+                            in_flight.add(sha256)
+                        pending.append(file)
+                    queue = deferred + queue
+
+                    futures = [pool.submit(_upload_staged_file, file, project_id) for file in pending]
+
+                    # Collect in submission order so results keep the input order
+                    uploaded = []
+                    for file, future in zip(pending, futures):
+                        nbytes = 0
+                        try:
+                            item = future.result()
+                            uploaded.append(item)
+                            nbytes = item["size"]
+                        except Exception as e:
+                            failures.append({
+                                "filename": file["filename"],
+                                "error": str(e)
+                            })
+
+                        # Coalesced progress update
+                        progress.advance(nbytes=nbytes, message=f"Uploaded {file['filename']}")
+
+                    if not uploaded:
+                        continue
 
+                    # One multi-row INSERT per chunk instead of a commit per file
+                    now = datetime.now()
+                    try:
+                        rows = db.execute(
+                            insert(Image)
+                            .values([
+                                {
+                                    "filepath": item["filepath"],
+                                    "storage_url": item["url"],
+                                    "project_id": project_id,
+                                    "uploaded_at": now,
+                                    "is_annotated": False,
+                                    "size_bytes": item["size"],
+                                    "width": item["width"],
+                                    "height": item["height"],
+                                    "mime_type": item["mime_type"],
+                                    "content_sha256": item["sha256"]
+                                }
+                                for item in uploaded
+                            ])
+                            # A concurrent upload may have stored the same content meanwhile
+                            .on_conflict_do_nothing(index_elements=["project_id", "content_sha256"])
+                            .returning(Image.id, Image.filepath)
+                        ).all()
+                        image_ids = {filepath: image_id for image_id, filepath in rows}
+                        bump_project_stats(
+                            db,
+                            project_id,
+                            images=len(rows),
+                            bytes_stored=sum(
+                                item["size"] for item in uploaded if item["filepath"] in image_ids
+                            )
+                        )
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        for item in uploaded:
+                            delete_blob_task.delay(item["filepath"])
+                            failures.append({
+                                "filename": item["filename"],
+                                "error": str(e)
+                            })
+                        continue
+
+                    raced = [item for item in uploaded if item["filepath"] not in image_ids]
+                    if raced:
+                        known.update(find_existing_images(db, project_id, [item["sha256"] for item in raced]))
+                    for item in raced:
+                        delete_blob_task.delay(item["filepath"])
+                        duplicates.append(item)
+
+                    for item in uploaded:
+                        if item in raced:
+                            continue
+                        if item["sha256"]:
+                            known[item["sha256"]] = image_ids[item["filepath"]]
+                        results.append({
+                            "filename": item["filename"],
+                            "image_id": image_ids[item["filepath"]],
+                            "url": item["url"],
+                            "status": "success"
+                        })
+                        generate_thumbnails_task.delay(image_ids[item["filepath"]])
+
+            result = {
+                "processed": len(results),
+                "failed": failures,
+                "success_items": results,
+                "duplicates": [
+                    {
+                        "filename": file["filename"],
+                        "image_id": known.get(file["sha256"])
+                    }
+                    for file in duplicates
+                ],
+                "total": total
+            }
+            progress.finish(result)
+            return result
+
+        except Exception as e:
+            progress.fail(str(e))
+            raise
+
+
+
+def _read_image_info(image_id: int, filepath: str) -> dict | None:
     try:
-        for index, file in enumerate(files):
-            filename = file["filename"]
-            contents = file["data"].encode("latin1")
-
-            blob_name = f"{project_id}/{uuid.uuid4()}_{filename}"
-
-            # Send progress update
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current": index + 1,
-                    "total": total,
-                    "message": f"Uploading {filename}..."
-                }
-            )
-
-            try:
-                upload_to_blob(blob_name, contents)
-                signed_url = generate_signed_url(blob_name)
-
-                new_image = Image(
-                    filepath=blob_name,
-                    storage_url=signed_url,
-                    project_id=project_id,
-                    uploaded_at=datetime.now(),
-                    is_annotated=False
-                )
-
-                db.add(new_image)
-                db.commit()
-                db.refresh(new_image)
-
-                results.append({
-                    "filename": filename,
-                    "image_id": new_image.id,
-                    "url": signed_url,
-                    "status": "success"
-                })
-
-            except Exception as e:
-                failures.append({
-                    "filename": filename,
-                    "error": str(e)
-                })
-
-        return {
-            "processed": len(results),
-            "failed": failures,
-            "success_items": results,
-            "total": total
-        }
+        header, size = download_blob_header(filepath, HEADER_BYTES)
+    except Exception as e:
+        logger.warning("Image info backfill skipped image %s: %s", image_id, e)
+        return None
 
-    finally:
-        db.close()
\ No newline at end of file
+    info = get_image_info(header)
+    return {
+        "id": image_id,
+        "width": info.width if info else None,
+        "height": info.height if info else None,
+        "mime_type": info.mime_type if info else UNKNOWN_MIME_TYPE,
+        "size_bytes": size
+    }
+
+
+@celery_app.task(name="backfill_image_info_task")
+def backfill_image_info_task(after_id: int = 0, batch_size: int = IMAGE_INFO_BACKFILL_BATCH):
+    """
+    Fill width, height, MIME type and size for images stored before they were
+    captured at ingest, reading only a ranged header from each blob. Runs one
+    id range at a time and re-enqueues itself from the last id, so it can be
+    resumed with `celery -A app.celery_app call backfill_image_info_task
+    --args='[<last_id>]'`.
+    """
+    with task_session() as db:
+        rows = db.execute(
+            select(Image.id, Image.filepath, Image.project_id, Image.size_bytes)
+            .where(Image.mime_type.is_(None), Image.id > after_id)
+            .order_by(Image.id)
+            .limit(batch_size)
+        ).all()
+
+        with ThreadPoolExecutor(max_workers=upload_settings.BATCH_UPLOAD_CONCURRENCY) as pool:
+            values = [v for v in pool.map(lambda row: _read_image_info(row.id, row.filepath), rows) if v]
+
+        if values:
+            # Bulk UPDATE by primary key, one statement for the whole range
+            db.execute(update(Image), values)
+
+            # Sizes not known before were never counted in the project stats
+            added = {}
+            previous = {row.id: row for row in rows}
+            for value in values:
+                row = previous[value["id"]]
+                if row.size_bytes is None:
+                    added[row.project_id] = added.get(row.project_id, 0) + value["size_bytes"]
+            for project_id, nbytes in added.items():
+                bump_project_stats(db, project_id, bytes_stored=nbytes)
+            db.commit()
+
+    if len(rows) == batch_size:
+        backfill_image_info_task.delay(rows[-1].id, batch_size)
+
+    return {
+        "updated": len(values),
+        "last_id": rows[-1].id if rows else after_id
+    }
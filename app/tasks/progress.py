@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import time
+
+from app.core.redis import redis_client, async_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Latest snapshot is kept as long as Celery keeps task results (1 day)
+PROGRESS_TTL = 24 * 60 * 60
+READY_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+def progress_channel(task_id: str) -> str:
+    return f"task_progress:{task_id}"
+
+def progress_snapshot_key(task_id: str) -> str:
+    return f"task_progress:{task_id}:latest"
+
+def progress_seq_key(task_id: str) -> str:
+    return f"task_progress:{task_id}:seq"
+
+
+def publish_progress(task_id: str, state: str, result) -> dict:
+    """
+    Called from workers. Every event gets a per-task sequence number (the
+    SSE event id), is stored as the latest snapshot for late joiners and
+    reconnects, and is published to the task's channel.
+    """
+    seq = redis_client.incr(progress_seq_key(task_id))
+    event = {"seq": seq, "task_id": task_id, "state": state, "result": result}
+    payload = json.dumps(event)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.expire(progress_seq_key(task_id), PROGRESS_TTL)
+    pipe.setex(progress_snapshot_key(task_id), PROGRESS_TTL, payload)
+    pipe.publish(progress_channel(task_id), payload)
+    pipe.execute()
+
+    return event
+
+
+class ProgressReporter:
+    """
+    Coalesces per-item progress for a bound Celery task. A PROGRESS state
+    is written at most every `min_interval` seconds, or sooner once `every`
+    items have piled up, instead of one result-backend write per item.
+    The meta also carries throughput (items/s, bytes/s) and an ETA.
+    """
+
+    def __init__(self, task, total: int, min_interval: float = 0.5, every: int | None = None, clock=time.monotonic):
+        self.task = task
+        self.total = total
+        self.min_interval = min_interval
+        self.every = every or max(1, total // 20)
+        self.clock = clock
+
+        self.current = 0
+        self.bytes_done = 0
+        self.message = None
+        self.started_at = clock()
+        self._last_flush_at = self.started_at
+        self._last_flush_count = 0
+
+    def advance(self, items: int = 1, nbytes: int = 0, message: str | None = None) -> None:
+        self.current += items
+        self.bytes_done += nbytes
+        if message is not None:
+            self.message = message
+
+        now = self.clock()
+        if (now - self._last_flush_at >= self.min_interval
+                or self.current - self._last_flush_count >= self.every):
+            self.flush(now)
+
+    def meta(self, now: float | None = None) -> dict:
+        elapsed = max((self.clock() if now is None else now) - self.started_at, 1e-9)
+        items_per_sec = self.current / elapsed
+        remaining = self.total - self.current
+
+        return {
+            "current": self.current,
+            "total": self.total,
+            "message": self.message,
+            "items_per_sec": round(items_per_sec, 2),
+            "bytes_per_sec": round(self.bytes_done / elapsed, 2),
+            "eta_seconds": round(remaining / items_per_sec, 1) if items_per_sec else None
+        }
+
+    def flush(self, now: float | None = None) -> None:
+        now = self.clock() if now is None else now
+        meta = self.meta(now)
+        self.task.update_state(state="PROGRESS", meta=meta)
+        publish_progress(self.task.request.id, "PROGRESS", meta)
+        self._last_flush_at = now
+        self._last_flush_count = self.current
+
+    def finish(self, result: dict) -> None:
+        """Always flushes the last progress, then publishes the final state."""
+        if self.current != self._last_flush_count:
+            self.flush()
+        publish_progress(self.task.request.id, "SUCCESS", result)
+
+    def fail(self, message: str) -> None:
+        publish_progress(self.task.request.id, "FAILURE", {**self.meta(), "message": message})
+
+
+async def get_latest_progress(task_id: str) -> dict | None:
+    payload = await async_redis_client.get(progress_snapshot_key(task_id))
+    return json.loads(payload) if payload else None
+
+
+class ProgressBroker:
+    """
+    One pub/sub connection per process, shared by every SSE watcher. Each
+    task channel is subscribed once, however many clients watch it, and a
+    single reader fans events out to the watchers' queues.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._pubsub = None
+        self._reader = None
+        self._watchers: dict[str, set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=100)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+
+            watchers = self._watchers.setdefault(task_id, set())
+            if not watchers:
+                await self._pubsub.subscribe(progress_channel(task_id))
+            watchers.add(queue)
+
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        async with self._lock:
+            watchers = self._watchers.get(task_id)
+            if watchers is None:
+                return
+            watchers.discard(queue)
+            if not watchers:
+                del self._watchers[task_id]
+                await self._pubsub.unsubscribe(progress_channel(task_id))
+
+    def _dispatch(self, message: dict) -> None:
+        task_id = message["channel"].split(":", 1)[1]
+        event = json.loads(message["data"])
+        for queue in list(self._watchers.get(task_id, ())):
+            if queue.full():
+                # Events are snapshots, so a slow client only needs the newest
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message":
+                    self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # redis-py re-subscribes the open channels when it reconnects
+                logger.exception("Task progress subscription failed, retrying")
+                await asyncio.sleep(1)
+
+
+progress_broker = ProgressBroker(async_redis_client)
@@ -0,0 +1,71 @@
+import logging
+from itertools import islice
+
+from sqlalchemy import delete, select
+
+import app.models
+
+from app.celery_app import celery_app
+from app.database import task_session
+from app.images.models import Image
+from app.projects.models import Project
+from app.tasks.blob_tasks import BLOB_DELETE_CHUNK
+from app.utils.blob_service import delete_blobs, list_blobs
+
+logger = logging.getLogger(__name__)
+
+# Image rows deleted per transaction; annotations go with them via ON DELETE CASCADE
+PROJECT_PURGE_CHUNK = 5000
+
+
+@celery_app.task(
+    name="purge_project_task",
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 5, "countdown": 30},
+)
+def purge_project_task(project_id: int):
+    """
+    Remove a project marked deleted. Rows go in short chunked transactions,
+    never loading them into a session; blobs are found by their
+    "{project_id}/" prefix rather than from the rows, so thumbnails and
+    orphans from failed uploads go too. Safe to re-run after a failure.
+    """
+    with task_session() as db:
+        deleted_at = db.scalar(select(Project.deleted_at).where(Project.id == project_id))
+        if deleted_at is None:
+            # Gone already, or not marked deleted
+            return {"images": 0, "blobs": 0}
+
+        images = 0
+        while True:
+            chunk = (
+                select(Image.id)
+                .where(Image.project_id == project_id)
+                .limit(PROJECT_PURGE_CHUNK)
+            )
+            deleted = db.execute(
+                delete(Image)
+                .where(Image.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            images += deleted
+            if deleted < PROJECT_PURGE_CHUNK:
+                break
+
+        blobs = 0
+        names = list_blobs(f"{project_id}/")
+        while batch := list(islice(names, BLOB_DELETE_CHUNK)):
+            delete_blobs(batch)
+            blobs += len(batch)
+
+        # Tags and stats cascade from the project row
+        db.execute(
+            delete(Project)
+            .where(Project.id == project_id)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    logger.info("Purged project %s: %s images, %s blobs", project_id, images, blobs)
+    return {"images": images, "blobs": blobs}
@@ -1,42 +1,92 @@
 import asyncio
 import json
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Header
 from celery.result import AsyncResult
 from sse_starlette.sse import EventSourceResponse
+from starlette.concurrency import run_in_threadpool
 from app.celery_app import celery_app
+from app.tasks.progress import progress_broker, get_latest_progress, READY_STATES
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+HEARTBEAT_INTERVAL = 15  # seconds
+# Quiet time after which the result backend is asked whether the task
+# ended without publishing (worker crash, revoke, failure outside fail())
+STATE_CHECK_INTERVAL = 5  # seconds
+
+def status_event(event: dict) -> dict:
+    return {
+        "id": str(event["seq"]),
+        "event": "status",
+        "data": json.dumps({
+            "task_id": event["task_id"],
+            "state": event["state"],
+            "result": event["result"]
+        })
+    }
+
+def get_backend_status(task_id: str) -> dict:
+    task = AsyncResult(task_id, app=celery_app)
+    return {
+        "seq": 0,
+        "task_id": task_id,
+        "state": task.state,
+        "result": task.result if task.ready() else task.info
+    }
+
 @router.get("/upload/batch/stream/{task_id}")
-async def stream_batch_upload_status(task_id: str):
+async def stream_batch_upload_status(task_id: str, last_event_id: Optional[str] = Header(None)):
     """
     SSE endpoint that streams task status updates in real-time.
-    Client connects once and receives updates until task completes.
+    Workers publish progress to a per-task Redis channel; all watchers of a
+    task share one subscription. Reconnecting clients send Last-Event-ID and
+    only receive the latest state if it is newer than what they have seen.
     """
+    try:
+        last_seen = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        last_seen = 0
+
     async def event_generator():
-        while True:
-            task = AsyncResult(task_id, app=celery_app)
-            
-            # Prepare the status data
-            data = {
-                "task_id": task_id,
-                "state": task.state,
-                "result": task.result if task.ready() else task.info
-            }
-            
-            yield {
-                "event": "status",
-                "data": json.dumps(data)
-            }
-            
-            # Stop streaming if task is complete (success or failure)
-            if task.ready():
-                break
-            
-            # Wait 1 second before next check
-            await asyncio.sleep(1)
+        nonlocal last_seen
+        # Subscribe before reading the snapshot so no event falls in between
+        queue = await progress_broker.subscribe(task_id)
+        try:
+            latest = await get_latest_progress(task_id)
+            if latest is None:
+                # Nothing published yet (queued, or finished before it could
+                # publish): ask the result backend once.
+                latest = await run_in_threadpool(get_backend_status, task_id)
+
+            if latest["seq"] == 0 or latest["seq"] > last_seen:
+                yield status_event(latest)
+                last_seen = max(last_seen, latest["seq"])
+            if latest["state"] in READY_STATES:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STATE_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    status = await run_in_threadpool(get_backend_status, task_id)
+                    if status["state"] in READY_STATES:
+                        yield status_event(status)
+                        break
+                    continue
+
+                if event["seq"] <= last_seen:
+                    continue
+                last_seen = event["seq"]
+                yield status_event(event)
+
+                # Stop streaming if task is complete (success or failure)
+                if event["state"] in READY_STATES:
+                    break
+        finally:
+            await progress_broker.unsubscribe(task_id, queue)
     
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(event_generator(), ping=HEARTBEAT_INTERVAL)
 
 @router.get("/upload/batch/status/{task_id}")
 def get_batch_upload_status(task_id: str):
@@ -46,5 +96,3 @@ def get_batch_upload_status(task_id: str):
         "state": task.state,
         "result": task.result
     }
-
-
@@ -0,0 +1,77 @@
+from PIL import UnidentifiedImageError
+from sqlalchemy import select, update
+
+import app.models
+
+from app.celery_app import celery_app
+from app.database import task_session
+from app.images.models import Image
+from app.images.thumbnails import render_thumbnails, thumbnail_blob_name
+from app.tasks.blob_tasks import delete_blob_task
+from app.utils.blob_service import download_blob, upload_to_blob
+
+THUMBNAIL_BACKFILL_BATCH = 500
+
+
+@celery_app.task(
+    name="generate_thumbnails_task",
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 3, "countdown": 30},
+)
+def generate_thumbnails_task(image_id: int):
+    with task_session() as db:
+        image = db.get(Image, image_id)
+        if image is None or image.thumbnails_ready:
+            return
+
+        try:
+            thumbnails = render_thumbnails(download_blob(image.filepath))
+        except UnidentifiedImageError:
+            # Not something Pillow can read; listings keep using the original
+            return
+
+        blob_names = []
+        for size, data in thumbnails.items():
+            blob_name = thumbnail_blob_name(image.filepath, size)
+            upload_to_blob(blob_name, data)
+            blob_names.append(blob_name)
+
+        marked = db.execute(
+            update(Image)
+            .where(Image.id == image_id)
+            .values(thumbnails_ready=True)
+        ).rowcount
+        db.commit()
+
+        # The image was deleted while we were rendering
+        if not marked:
+            for blob_name in blob_names:
+                delete_blob_task.delay(blob_name)
+
+
+@celery_app.task(name="backfill_thumbnails_task")
+def backfill_thumbnails_task(after_id: int = 0, batch_size: int = THUMBNAIL_BACKFILL_BATCH):
+    """
+    Queue thumbnail generation for images that have none, one id range at a
+    time. Each run re-enqueues itself from the last id it saw, so a stopped
+    backfill resumes with `celery -A app.celery_app call backfill_thumbnails_task
+    --args='[<last_id>]'`.
+    """
+    with task_session() as db:
+        image_ids = db.scalars(
+            select(Image.id)
+            .where(Image.thumbnails_ready == False, Image.id > after_id)
+            .order_by(Image.id)
+            .limit(batch_size)
+        ).all()
+
+    for image_id in image_ids:
+        generate_thumbnails_task.delay(image_id)
+
+    if len(image_ids) == batch_size:
+        backfill_thumbnails_task.delay(image_ids[-1], batch_size)
+
+    return {
+        "queued": len(image_ids),
+        "last_id": image_ids[-1] if image_ids else after_id
+    }
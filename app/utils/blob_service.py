@@ -1,36 +1,29 @@
-from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
-from datetime import datetime, timedelta
+from datetime import timedelta
+from typing import BinaryIO, Iterator
 
-from app.config import AzureStorageSettings
+from app.storage import get_storage
 
-from dotenv import load_dotenv
-load_dotenv()
+# Thin wrappers over the configured storage backend (see app/storage),
+# kept so callers don't need to know which backend is in use.
 
-
-azure_settings = AzureStorageSettings()
-
-connection_string = (
-    f"DefaultEndpointsProtocol=https;AccountName={azure_settings.AZURE_STORAGE_ACCOUNT_NAME};AccountKey={azure_settings.AZURE_STORAGE_KEY};EndpointSuffix=core.windows.net"
-)
-blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-
-container_client = blob_service_client.get_container_client(azure_settings.AZURE_STORAGE_CONTAINER_NAME)
-
-def upload_to_blob(blob_name:str, data:bytes) -> None:
-    container_client.upload_blob(name=blob_name, data=data, overwrite=True)
+def upload_to_blob(blob_name:str, data:bytes | BinaryIO) -> None:
+    get_storage().upload(blob_name, data)
 
 def generate_signed_url(blob_name:str,hours:int=1) -> str:
-    sas_token = generate_blob_sas(
-        account_name = azure_settings.AZURE_STORAGE_ACCOUNT_NAME,
-        container_name = azure_settings.AZURE_STORAGE_CONTAINER_NAME,
-        blob_name = blob_name,
-        account_key = azure_settings.AZURE_STORAGE_KEY,
-        permission = BlobSasPermissions(read=True),
-        expiry = datetime.now() + timedelta(hours=hours)
+    return get_storage().signed_url(blob_name, timedelta(hours=hours))
 
-    )
-    return f"https://{azure_settings.AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{azure_settings.AZURE_STORAGE_CONTAINER_NAME}/{blob_name}?{sas_token}"
+def download_blob(blob_name:str) -> bytes:
+    return get_storage().download(blob_name)
 
+def download_blob_header(blob_name:str, length:int) -> tuple[bytes, int]:
+    """Ranged read of the first `length` bytes; also returns the full blob size."""
+    return get_storage().read_header(blob_name, length)
 
 def delete_blob(blob_name:str) -> None:
-    container_client.delete_blob(blob_name)
+    get_storage().delete(blob_name)
+
+def delete_blobs(blob_names:list[str]) -> None:
+    get_storage().delete_many(blob_names)
+
+def list_blobs(prefix:str) -> Iterator[str]:
+    return get_storage().list(prefix)
@@ -0,0 +1,100 @@
+import struct
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+# Enough for the headers of every format below, including JPEGs with
+# large EXIF segments before the SOF marker in most cases.
+HEADER_BYTES = 64 * 1024
+# Stored for files whose header is not a format we can parse
+UNKNOWN_MIME_TYPE = "application/octet-stream"
+
+
+class ImageInfo(NamedTuple):
+    width: Optional[int]
+    height: Optional[int]
+    mime_type: str
+
+
+def get_image_info(data: bytes) -> Optional[ImageInfo]:
+    """
+    Return the format and (width, height) parsed from the image header
+    without decoding pixels. Supports PNG, JPEG, GIF, WebP and BMP; None
+    if the format is unknown, None dimensions if the header is truncated.
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _info("image/png", struct.unpack(">II", data[16:24]) if len(data) >= 24 else None)
+
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return _info("image/gif", struct.unpack("<HH", data[6:10]) if len(data) >= 10 else None)
+
+    if data.startswith(b"BM"):
+        size = None
+        if len(data) >= 26:
+            width, height = struct.unpack("<ii", data[18:26])
+            size = width, abs(height)
+        return _info("image/bmp", size)
+
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return _info("image/webp", _webp_size(data))
+
+    if data.startswith(b"\xff\xd8"):
+        return _info("image/jpeg", _jpeg_size(data))
+
+    return None
+
+
+def get_stream_info(fileobj: BinaryIO) -> Optional[ImageInfo]:
+    """Parse the header of a seekable stream and rewind it for the upload."""
+    data = fileobj.read(HEADER_BYTES)
+    fileobj.seek(0)
+    return get_image_info(data)
+
+
+def get_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from the image header, or None if unknown."""
+    info = get_image_info(data)
+    if info is None or info.width is None:
+        return None
+    return info.width, info.height
+
+
+def _info(mime_type: str, size: Optional[Tuple[int, int]]) -> ImageInfo:
+    width, height = size if size else (None, None)
+    return ImageInfo(width, height, mime_type)
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        # Standalone markers carry no length
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
@@ -27,6 +27,7 @@ interface Image {
   id: number;
   filepath: string;
   storage_url: string;
+  thumbnail_url?: string;
   uploaded_at: string;
 }
 
@@ -201,7 +202,7 @@ const ImageGallery: React.FC<ImageGalleryProps> = ({
               {/* Image */}
               <CardMedia
                 component="img"
-                src={image.storage_url}
+                src={image.thumbnail_url ?? image.storage_url}
                 alt="uploaded image"
                 sx={{
                   height: 180,
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { Container, Typography, Box, CircularProgress, Alert, Button, Card, CardContent } from '@mui/material';
 import ArrowBackIcon from '@mui/icons-material/ArrowBack';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getImage, getAnnotations, createAnnotation, getTags, deleteAnnotation, getImages } from '../services/api';
+import { getImage, getAnnotations, replaceAnnotations, getTags, claimNextImage } from '../services/api';
 import { Annotator, type BoxType } from '../components/Annotator';
 
 interface Image {
@@ -71,40 +71,25 @@ const AnnotationPage: React.FC = () => {
     setSubmitSuccess(null);
 
     try {
-      // First, delete all existing annotations for this image
-      const existingAnnotations = await getAnnotations(Number(projectId), Number(imageId));
-      await Promise.all(
-        existingAnnotations.data.map((anno: any) =>
-          deleteAnnotation(Number(projectId), anno.id, Number(imageId))
-        )
-      );
-
-      // Then, create all the new annotations
-      const annotationPromises = boxes.map(box => {
-        const payload = {
-          image_id: Number(imageId),
-          annotation: {
-            x: box.x,
-            y: box.y,
-            w: box.w,
-            h: box.h,
-            tag: box.tag || 'untagged',
-          },
-        };
-        return createAnnotation(Number(projectId), payload);
-      });
-
-      if (annotationPromises.length === 0) {
+      // Send the full box set; the server only writes what changed
+      const newAnnotations = boxes.map(box => ({
+        x: box.x,
+        y: box.y,
+        w: box.w,
+        h: box.h,
+        tag: box.tag || 'untagged',
+      }));
+      await replaceAnnotations(Number(projectId), Number(imageId), newAnnotations);
+
+      if (newAnnotations.length === 0) {
         // This means we just cleared the annotations
         setSubmitSuccess("All annotations for this image have been cleared.");
         setTimeout(() => navigate(`/projects/${projectId}/images`), 1500);
       } else {
-        await Promise.all(annotationPromises);
-
-        // Fetch the next image to annotate
-        const nextImagesResponse = await getImages(Number(projectId), 1, 1);
-        if (nextImagesResponse.data.images.length > 0) {
-          const nextImageId = nextImagesResponse.data.images[0].id;
+        // Claim the next image so parallel annotators never get the same one
+        const nextImageResponse = await claimNextImage(Number(projectId));
+        if (nextImageResponse.status === 200) {
+          const nextImageId = nextImageResponse.data.id;
           setSubmitSuccess("Annotations submitted successfully! Loading next image...");
           setTimeout(() => {
             navigate(`/projects/${projectId}/images/${nextImageId}/annotate`);
@@ -3,7 +3,7 @@ import { Container, Typography, Box, CircularProgress, Alert, Button, Select, Me
 import type { SelectChangeEvent } from '@mui/material';
 import { useNavigate, useParams } from 'react-router-dom';
 import ArrowBackIcon from '@mui/icons-material/ArrowBack';
-import { getImages, deleteImage } from '../services/api';
+import { getImages, deleteImagesBulk } from '../services/api';
 import ImageUpload from '../components/ImageUpload';
 import ImageGallery from '../components/ImageGallery';
 
@@ -11,6 +11,7 @@ interface Image {
   id: number;
   filepath: string;
   storage_url: string;
+  thumbnail_url?: string;
   uploaded_at: string;
 }
 
@@ -65,7 +66,7 @@ const ImagesPage: React.FC = () => {
     setLoading(true);
     setError(null);
     try {
-      await Promise.all(selectedImages.map(id => deleteImage(Number(projectId), id)));
+      await deleteImagesBulk(Number(projectId), selectedImages);
       setSelectedImages([]);
       fetchImages();
     } catch (err: any) {
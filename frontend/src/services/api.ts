@@ -54,15 +54,19 @@ export const uploadBatchImages = (projectId: number, files: FileList) => {
   });
 }
 export const deleteImage = (projectId: number, imageId: number) => api.delete(`/projects/${projectId}/images/${imageId}`);
+export const deleteImagesBulk = (projectId: number, imageIds: number[]) => api.post(`/projects/${projectId}/images/bulk-delete`, { image_ids: imageIds });
 
 // Task Status APIs
 export const getTaskStatusStreamUrl = (taskId: string) => `/tasks/upload/batch/stream/${taskId}`;
 export const getTaskStatus = (taskId: string) => api.get(`/tasks/upload/batch/status/${taskId}`);
 export const getImage = (projectId: number, imageId: number) => api.get(`/projects/${projectId}/images/${imageId}`);
+// Leases the next unannotated image to this annotator; 204 when none are left
+export const claimNextImage = (projectId: number) => api.post(`/projects/${projectId}/images/next`);
 
 // Annotation APIs
 export const getAnnotations = (projectId: number, imageId: number) => api.get(`/projects/${projectId}/annotations/${imageId}`);
 export const createAnnotation = (projectId: number, data: any) => api.post(`/projects/${projectId}/annotations`, data);
+export const replaceAnnotations = (projectId: number, imageId: number, annotations: any[]) => api.put(`/projects/${projectId}/annotations/${imageId}`, { annotations });
 export const deleteAnnotation = (projectId: number, annotationId: number, imageId: number) => api.delete(`/projects/${projectId}/annotations/delete/${annotationId}/${imageId}`);
 export const getTags = (projectId: number) => api.get(`/projects/${projectId}/annotations/tags`);
 
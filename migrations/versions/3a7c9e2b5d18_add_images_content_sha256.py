@@ -0,0 +1,40 @@
+"""add images.content_sha256 for upload dedup
+
+Revision ID: 3a7c9e2b5d18
+Revises: 8d2a6f0c4b91
+Create Date: 2026-10-17 12:31:07.224815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c9e2b5d18'
+down_revision: Union[str, Sequence[str], None] = '8d2a6f0c4b91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL: hashing them would mean downloading every blob,
+    # and NULLs never collide in the unique index.
+    op.add_column('images', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_images_project_id_content_sha256',
+            'images',
+            ['project_id', 'content_sha256'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_images_project_id_content_sha256', table_name='images', postgresql_concurrently=True)
+    op.drop_column('images', 'content_sha256')
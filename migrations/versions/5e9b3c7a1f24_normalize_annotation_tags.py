@@ -0,0 +1,65 @@
+"""normalize annotation tags into a per-project tags table
+
+Revision ID: 5e9b3c7a1f24
+Revises: c1f4e8a2d7b3
+Create Date: 2026-10-17 11:02:17.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9b3c7a1f24'
+down_revision: Union[str, Sequence[str], None] = 'c1f4e8a2d7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('usage_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'name', name='uq_tags_project_id_name')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.add_column('annotations', sa.Column('tag_id', sa.Integer(), nullable=True))
+
+    # Backfill the dictionary and its counts from the free-text column
+    op.execute("""
+        INSERT INTO tags (project_id, name, usage_count)
+        SELECT images.project_id, annotations.tag, count(*)
+        FROM annotations JOIN images ON images.id = annotations.image_id
+        GROUP BY images.project_id, annotations.tag
+    """)
+    op.execute("""
+        UPDATE annotations SET tag_id = tags.id
+        FROM images, tags
+        WHERE images.id = annotations.image_id
+          AND tags.project_id = images.project_id
+          AND tags.name = annotations.tag
+    """)
+
+    op.alter_column('annotations', 'tag_id', existing_type=sa.Integer(), nullable=False)
+    op.create_foreign_key('annotations_tag_id_fkey', 'annotations', 'tags', ['tag_id'], ['id'])
+    op.create_index(op.f('ix_annotations_tag_id'), 'annotations', ['tag_id'], unique=False)
+    op.drop_column('annotations', 'tag')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('annotations', sa.Column('tag', sa.VARCHAR(), autoincrement=False, nullable=True))
+    op.execute("UPDATE annotations SET tag = tags.name FROM tags WHERE tags.id = annotations.tag_id")
+    op.alter_column('annotations', 'tag', existing_type=sa.VARCHAR(), nullable=False)
+    op.drop_index(op.f('ix_annotations_tag_id'), table_name='annotations')
+    op.drop_constraint('annotations_tag_id_fkey', 'annotations', type_='foreignkey')
+    op.drop_column('annotations', 'tag_id')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,29 @@
+"""add images.thumbnails_ready
+
+Revision ID: 7f1d4b8e2c60
+Revises: 3a7c9e2b5d18
+Create Date: 2026-10-17 13:05:42.118093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f1d4b8e2c60'
+down_revision: Union[str, Sequence[str], None] = '3a7c9e2b5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing images are picked up by backfill_thumbnails_task
+    op.add_column('images', sa.Column('thumbnails_ready', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('images', 'thumbnails_ready')
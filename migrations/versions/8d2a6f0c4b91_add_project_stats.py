@@ -0,0 +1,51 @@
+"""add project_stats and images.size_bytes
+
+Revision ID: 8d2a6f0c4b91
+Revises: 5e9b3c7a1f24
+Create Date: 2026-10-17 11:48:52.917340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2a6f0c4b91'
+down_revision: Union[str, Sequence[str], None] = '5e9b3c7a1f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('images', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('total_images', sa.Integer(), nullable=False),
+    sa.Column('annotated_images', sa.Integer(), nullable=False),
+    sa.Column('total_boxes', sa.Integer(), nullable=False),
+    sa.Column('bytes_stored', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+
+    # Existing images have no recorded size, so bytes_stored starts at 0
+    # for them; it is corrected once their metadata is backfilled.
+    op.execute("""
+        INSERT INTO project_stats (project_id, total_images, annotated_images, total_boxes, bytes_stored)
+        SELECT projects.id,
+               (SELECT count(*) FROM images WHERE images.project_id = projects.id),
+               (SELECT count(*) FROM images WHERE images.project_id = projects.id AND images.is_annotated),
+               (SELECT count(*) FROM annotations JOIN images ON images.id = annotations.image_id
+                WHERE images.project_id = projects.id),
+               0
+        FROM projects
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('project_stats')
+    op.drop_column('images', 'size_bytes')
@@ -0,0 +1,33 @@
+"""add images.width, height and mime_type
+
+Revision ID: b52e0d7a9c34
+Revises: 7f1d4b8e2c60
+Create Date: 2026-10-17 13:40:19.650271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52e0d7a9c34'
+down_revision: Union[str, Sequence[str], None] = '7f1d4b8e2c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows are filled in by backfill_image_info_task
+    op.add_column('images', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('images', sa.Column('mime_type', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('images', 'mime_type')
+    op.drop_column('images', 'height')
+    op.drop_column('images', 'width')
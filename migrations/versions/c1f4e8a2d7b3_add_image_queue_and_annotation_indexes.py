@@ -0,0 +1,55 @@
+"""add image queue and annotation image_id indexes
+
+Revision ID: c1f4e8a2d7b3
+Revises: b324b1638599
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1f4e8a2d7b3'
+down_revision: Union[str, Sequence[str], None] = 'b324b1638599'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY so existing tables stay writable during the build.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_images_unannotated_queue',
+            'images',
+            ['project_id', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text('is_annotated = false'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_images_annotated_queue',
+            'images',
+            ['project_id', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text('is_annotated = true'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f('ix_annotations_image_id'),
+            'annotations',
+            ['image_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_annotations_image_id'), table_name='annotations', postgresql_concurrently=True)
+        op.drop_index('ix_images_annotated_queue', table_name='images', postgresql_concurrently=True)
+        op.drop_index('ix_images_unannotated_queue', table_name='images', postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""add projects.deleted_at and ON DELETE CASCADE for images and annotations
+
+Revision ID: e8c3f1a6b9d2
+Revises: b52e0d7a9c34
+Create Date: 2026-10-17 14:22:51.384906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3f1a6b9d2'
+down_revision: Union[str, Sequence[str], None] = 'b52e0d7a9c34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.drop_constraint('images_project_id_fkey', 'images', type_='foreignkey')
+    op.create_foreign_key('images_project_id_fkey', 'images', 'projects', ['project_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('annotations_image_id_fkey', 'annotations', type_='foreignkey')
+    op.create_foreign_key('annotations_image_id_fkey', 'annotations', 'images', ['image_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('annotations_image_id_fkey', 'annotations', type_='foreignkey')
+    op.create_foreign_key('annotations_image_id_fkey', 'annotations', 'images', ['image_id'], ['id'])
+    op.drop_constraint('images_project_id_fkey', 'images', type_='foreignkey')
+    op.create_foreign_key('images_project_id_fkey', 'images', 'projects', ['project_id'], ['id'])
+    op.drop_column('projects', 'deleted_at')
@@ -0,0 +1,28 @@
+"""add images.claimed_until for the annotation work queue
+
+Revision ID: f3a9d7c2e5b1
+Revises: e8c3f1a6b9d2
+Create Date: 2026-10-17 16:05:12.527318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d7c2e5b1'
+down_revision: Union[str, Sequence[str], None] = 'e8c3f1a6b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('images', sa.Column('claimed_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('images', 'claimed_until')
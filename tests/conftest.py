@@ -1,13 +1,20 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.main import app
 from app.auth.models import User
 from app.config import DBSettings
-from app.auth.security import hash_password
+from app.auth.security import hash_password, user_cache
+from app.auth.hashing import password_hasher
+from app.projects.ownership import ownership_cache
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -23,6 +30,14 @@ TEST_DATABASE_URL = (
 test_engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# TestClient may run each request on a fresh event loop, and asyncpg
+# connections can't move between loops, so don't pool them.
+test_async_engine = create_async_engine(
+    TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(bind=test_async_engine, autoflush=False, expire_on_commit=False)
+
 
 # ---- Dependency override ----
 def override_get_db():
@@ -32,7 +47,30 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+# bcrypt in-process: spawning the hashing workers costs more than the tests
+password_hasher.start(ThreadPoolExecutor(max_workers=2))
+
+
+def wait_for_lock_waiter(count: int = 1, timeout: float = 5):
+    """Block until `count` connections in the test database are waiting on a lock."""
+    deadline = time.monotonic() + timeout
+    while True:
+        # pg_stat_activity is snapshotted per transaction, so ask afresh each time
+        with test_engine.connect() as conn:
+            if conn.scalar(text(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE wait_event_type = 'Lock' AND datname = current_database()"
+            )) >= count:
+                return
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
 
 
 # ---- Fixtures ----
@@ -40,6 +78,8 @@ app.dependency_overrides[get_db] = override_get_db
 def setup_database():
     """Drop and recreate schema for isolation."""
     Base.metadata.create_all(bind=test_engine)
+    user_cache.clear()
+    ownership_cache.clear()
     yield
     Base.metadata.drop_all(bind=test_engine)
 
@@ -103,4 +103,292 @@ def test_delete_annotation_success(client: TestClient, test_project, test_image)
 
     # Verify it's deleted
     response = client.get(f"/projects/{project_id}/annotations/{image_id}")
-    assert len(response.json()) == 0
\ No newline at end of file
+    assert len(response.json()) == 0
+
+def test_create_annotations_bulk(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+
+    bulk_data = {
+        "image_id": image_id,
+        "annotations": [
+            {"x": 0.1, "y": 0.2, "w": 0.3, "h": 0.4, "tag": "cat"},
+            {"x": 0.5, "y": 0.5, "w": 0.1, "h": 0.1, "tag": "dog"},
+        ]
+    }
+
+    response = client.post(f"/projects/{project_id}/annotations/bulk", json=bulk_data)
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data) == 2
+    assert {a["tag"] for a in data} == {"cat", "dog"}
+    assert all(a["image_id"] == image_id for a in data)
+
+    # The image should now be in the annotated queue
+    response = client.get(f"/projects/{project_id}/images/annotated")
+    assert [img["id"] for img in response.json()["images"]] == [image_id]
+
+def test_create_annotations_bulk_wrong_image(client: TestClient, test_project):
+    project_id = test_project["id"]
+
+    response = client.post(
+        f"/projects/{project_id}/annotations/bulk",
+        json={"image_id": 9999, "annotations": [{"x": 0, "y": 0, "w": 0, "h": 0, "tag": "t"}]}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Image not found in this project"
+
+def test_tag_counts_follow_creates_and_deletes(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+
+    created = client.post(f"/projects/{project_id}/annotations/bulk", json={
+        "image_id": image_id,
+        "annotations": [
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "cat"},
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "cat"},
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "dog"},
+        ]
+    }).json()
+    client.post(f"/projects/{project_id}/annotations", json={"image_id": image_id, "annotation": {"x": 0, "y": 0, "w": 0, "h": 0, "tag": "dog"}})
+
+    response = client.get(f"/projects/{project_id}/annotations/tags/counts")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "cat", "count": 2}, {"name": "dog", "count": 2}]
+
+    dog = next(a for a in created if a["tag"] == "dog")
+    client.delete(f"/projects/{project_id}/annotations/delete/{dog['id']}/{image_id}")
+
+    response = client.get(f"/projects/{project_id}/annotations/tags/counts")
+    assert response.json() == [{"name": "cat", "count": 2}, {"name": "dog", "count": 1}]
+
+def test_deleting_image_releases_tags(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+
+    client.post(f"/projects/{project_id}/annotations", json={"image_id": image_id, "annotation": {"x": 0, "y": 0, "w": 0, "h": 0, "tag": "cat"}})
+    client.delete(f"/projects/{project_id}/images/{image_id}")
+
+    assert client.get(f"/projects/{project_id}/annotations/tags").json() == []
+
+def test_replace_annotations_applies_minimal_diff(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+
+    created = client.post(f"/projects/{project_id}/annotations/bulk", json={
+        "image_id": image_id,
+        "annotations": [
+            {"x": 0.1, "y": 0.1, "w": 0.2, "h": 0.2, "tag": "cat"},
+            {"x": 0.5, "y": 0.5, "w": 0.1, "h": 0.1, "tag": "dog"},
+            {"x": 0.7, "y": 0.7, "w": 0.1, "h": 0.1, "tag": "dog"},
+        ]
+    }).json()
+    ids = {(a["x"], a["tag"]): a["id"] for a in created}
+
+    # Keep the cat, move one dog, drop the other and add a bird
+    response = client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": [
+        {"x": 0.1, "y": 0.1, "w": 0.2, "h": 0.2, "tag": "cat"},
+        {"x": 0.6, "y": 0.5, "w": 0.1, "h": 0.1, "tag": "dog"},
+        {"x": 0.2, "y": 0.2, "w": 0.3, "h": 0.3, "tag": "bird"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 3
+    assert next(a for a in data if a["tag"] == "cat")["id"] == ids[(0.1, "cat")]
+    # Leftover rows are rewritten in place rather than deleted and re-inserted
+    assert {a["id"] for a in data} == set(ids.values())
+    stored = client.get(f"/projects/{project_id}/annotations/{image_id}").json()
+    assert sorted(stored, key=lambda a: a["id"]) == data
+
+    response = client.get(f"/projects/{project_id}/annotations/tags/counts")
+    assert response.json() == [
+        {"name": "bird", "count": 1}, {"name": "cat", "count": 1}, {"name": "dog", "count": 1}
+    ]
+    stats = client.get(f"/projects/{project_id}").json()["stats"]
+    assert stats["total_boxes"] == 3
+    assert stats["annotated_images"] == 1
+
+def test_replace_annotations_unchanged_is_noop(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+    boxes = [{"x": 0.1 * i, "y": 0.1, "w": 0.05, "h": 0.05, "tag": "cat"} for i in range(5)]
+
+    first = client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": boxes}).json()
+
+    with patch("app.annotations.routes.acquire_tags") as mock_acquire, \
+         patch("app.annotations.routes.bump_project_stats") as mock_stats:
+        response = client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": boxes})
+
+    assert response.status_code == 200
+    assert response.json() == first
+    mock_acquire.assert_not_called()
+    mock_stats.assert_not_called()
+
+def test_replace_annotations_with_empty_set_unannotates(client: TestClient, test_project, test_image):
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+
+    client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": [
+        {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "cat"},
+    ]})
+    response = client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": []})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    assert client.get(f"/projects/{project_id}/images/annotated").json()["images"] == []
+    assert client.get(f"/projects/{project_id}/annotations/tags").json() == []
+    stats = client.get(f"/projects/{project_id}").json()["stats"]
+    assert stats["total_boxes"] == 0
+    assert stats["annotated_images"] == 0
+
+def test_tag_writes_lock_rows_in_a_fixed_order(test_project, db_session):
+    import threading
+    from sqlalchemy import select
+    from app.annotations.models import Tag
+    from app.annotations.tags import acquire_tags, release_image_tags, release_tags
+    from app.images.models import Image
+    from app.annotations.models import Annotation
+    from tests.conftest import TestingSessionLocal, wait_for_lock_waiter
+
+    project_id = test_project["id"]
+    # Created so that id order and name order disagree
+    dog = Tag(project_id=project_id, name="dog", usage_count=5)
+    db_session.add(dog)
+    db_session.flush()
+    cat = Tag(project_id=project_id, name="cat", usage_count=5)
+    db_session.add(cat)
+    db_session.flush()
+    image = Image(filepath="a.jpg", storage_url="u", project_id=project_id)
+    db_session.add(image)
+    db_session.flush()
+    db_session.add_all([
+        Annotation(image_id=image.id, x=0, y=0, w=1, h=1, tag_id=cat.id),
+        Annotation(image_id=image.id, x=0, y=0, w=1, h=1, tag_id=dog.id),
+    ])
+    db_session.commit()
+
+    errors = []
+
+    def in_transaction(write):
+        def run():
+            db = TestingSessionLocal()
+            try:
+                write(db)
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+        return threading.Thread(target=run)
+
+    writers = [
+        in_transaction(lambda db: acquire_tags(db, project_id, ["cat", "dog"])),
+        in_transaction(lambda db: release_tags(db, [cat.id, dog.id])),
+        in_transaction(lambda db: release_image_tags(db, [image.id])),
+    ]
+
+    holder = TestingSessionLocal()
+    try:
+        holder.execute(select(Tag).where(Tag.id == dog.id).with_for_update())
+        for writer in writers:
+            writer.start()
+        wait_for_lock_waiter(count=len(writers))
+
+        # Every writer queues on the lowest id first and so holds no lock on
+        # "cat" that another writer could be waiting behind
+        holder.execute(select(Tag).where(Tag.id == cat.id).with_for_update(nowait=True))
+    finally:
+        holder.rollback()
+        holder.close()
+    for writer in writers:
+        writer.join()
+
+    assert errors == []
+    db_session.expire_all()
+    assert db_session.get(Tag, cat.id).usage_count == 4
+    assert db_session.get(Tag, dog.id).usage_count == 4
+
+def test_annotation_writes_lock_the_image_before_tags(client: TestClient, test_project, test_image, db_session):
+    import threading
+    from sqlalchemy import select
+    from app.annotations.models import Tag
+    from app.images.models import Image
+    from tests.conftest import TestingSessionLocal, wait_for_lock_waiter
+
+    project_id = test_project["id"]
+    image_id = test_image["id"]
+    tag = Tag(project_id=project_id, name="cat", usage_count=0)
+    db_session.add(tag)
+    db_session.commit()
+
+    responses = []
+    box = {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "cat"}
+    first_save = threading.Thread(target=lambda: responses.append(
+        client.post(f"/projects/{project_id}/annotations", json={"image_id": image_id, "annotation": box})
+    ))
+
+    holder = TestingSessionLocal()
+    try:
+        holder.execute(select(Image).where(Image.id == image_id).with_for_update())
+        first_save.start()
+
+        wait_for_lock_waiter()
+
+        # The save is queued on the image and has not touched the tag yet
+        holder.execute(select(Tag).where(Tag.id == tag.id).with_for_update(nowait=True))
+    finally:
+        holder.rollback()
+        holder.close()
+    first_save.join()
+
+    assert responses[0].status_code == 201
+    assert client.get(f"/projects/{project_id}").json()["stats"]["annotated_images"] == 1
+
+def test_opposite_relabels_do_not_deadlock(client: TestClient, test_project, db_session):
+    import threading
+    from sqlalchemy import select
+    from app.annotations.models import Tag
+    from app.images.models import Image
+    from tests.conftest import TestingSessionLocal, wait_for_lock_waiter
+
+    project_id = test_project["id"]
+    images = [Image(filepath=f"{name}.jpg", storage_url="u", project_id=project_id) for name in "ab"]
+    db_session.add_all(images)
+    db_session.commit()
+    a, b = (img.id for img in images)
+
+    def put(image_id, tag):
+        return client.put(f"/projects/{project_id}/annotations/{image_id}", json={"annotations": [
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": tag},
+        ]})
+
+    put(a, "cat")
+    put(b, "dog")
+    cat, dog = (db_session.query(Tag).filter(Tag.name == name).one() for name in ("cat", "dog"))
+
+    responses = []
+    relabels = [
+        threading.Thread(target=lambda: responses.append(put(a, "dog"))),
+        threading.Thread(target=lambda: responses.append(put(b, "cat"))),
+    ]
+
+    holder = TestingSessionLocal()
+    try:
+        first, second = sorted([cat.id, dog.id])
+        holder.execute(select(Tag).where(Tag.id == first).with_for_update())
+        for relabel in relabels:
+            relabel.start()
+        wait_for_lock_waiter(count=len(relabels))
+
+        # Both saves queue on the lower tag id and hold nothing on the other
+        holder.execute(select(Tag).where(Tag.id == second).with_for_update(nowait=True))
+    finally:
+        holder.rollback()
+        holder.close()
+    for relabel in relabels:
+        relabel.join()
+
+    assert [r.status_code for r in responses] == [200, 200]
+    db_session.expire_all()
+    assert db_session.get(Tag, cat.id).usage_count == 1
+    assert db_session.get(Tag, dog.id).usage_count == 1
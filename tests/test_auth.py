@@ -91,3 +91,39 @@ def test_login_invalid_username(client):
     assert response.status_code == 404
     assert response.json() == {"detail": "User does not exist"}
 
+
+def test_login_rehashes_password_with_new_cost(client, db_session):
+    from app.auth.models import User
+    from app.auth.hashing import get_pwd_context, hash_settings
+
+    old_rounds = 4 if hash_settings.BCRYPT_ROUNDS != 4 else 5
+    user = User(email="rehash@gmail.com", hashed_password=get_pwd_context(old_rounds).hash("testpass"))
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post(
+        "/auth/login",
+        data={"username": "rehash@gmail.com", "password": "testpass"}
+    )
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert not get_pwd_context(hash_settings.BCRYPT_ROUNDS).needs_update(user.hashed_password)
+    assert get_pwd_context(hash_settings.BCRYPT_ROUNDS).verify("testpass", user.hashed_password)
+
+def test_login_rejects_when_hash_queue_full(client):
+    from unittest.mock import patch
+    from app.auth.hashing import password_hasher
+
+    client.post(
+        "/auth/register",
+        json={"email": "testuser@gmail.com", "password": "testpass"}
+    )
+
+    with patch.object(password_hasher, "max_pending", 0):
+        response = client.post(
+            "/auth/login",
+            data={"username": "testuser@gmail.com", "password": "testpass"}
+        )
+
+    assert response.status_code == 503
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.core.local_cache import TTLCache
+from app.images.cache import (
+    get_signed_urls_cached, get_signed_url_cached, get_thumbnail_urls_cached, local_signed_urls, SIGNED_URL_TTL
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    local_signed_urls.clear()
+    yield
+    local_signed_urls.clear()
+
+
+def test_get_signed_urls_cached_batches_redis_calls():
+    images = [SimpleNamespace(id=i, filepath=f"1/img{i}.jpg") for i in range(3)]
+    redis = MagicMock()
+    redis.mget.return_value = ["https://cached/0", None, None]
+
+    with patch("app.images.cache.redis_client", redis), \
+         patch("app.images.cache.generate_signed_url", side_effect=lambda path, hours: f"https://new/{path}"):
+        urls = get_signed_urls_cached(images)
+
+    assert urls == {0: "https://cached/0", 1: "https://new/1/img1.jpg", 2: "https://new/1/img2.jpg"}
+    redis.mget.assert_called_once_with(["signed_url:image:0", "signed_url:image:1", "signed_url:image:2"])
+
+    pipe = redis.pipeline.return_value
+    pipe.setex.assert_any_call("signed_url:image:1", SIGNED_URL_TTL, "https://new/1/img1.jpg")
+    pipe.setex.assert_any_call("signed_url:image:2", SIGNED_URL_TTL, "https://new/1/img2.jpg")
+    pipe.execute.assert_called_once()
+    redis.get.assert_not_called()
+
+
+def test_get_signed_url_cached_hit_skips_sas_generation():
+    redis = MagicMock()
+    redis.mget.return_value = ["https://cached/7"]
+
+    with patch("app.images.cache.redis_client", redis), \
+         patch("app.images.cache.generate_signed_url") as mock_generate:
+        url = get_signed_url_cached(SimpleNamespace(id=7, filepath="1/img7.jpg"))
+
+    assert url == "https://cached/7"
+    mock_generate.assert_not_called()
+    redis.pipeline.assert_not_called()
+
+
+def test_local_cache_serves_repeat_lookups_without_redis():
+    image = SimpleNamespace(id=3, filepath="1/img3.jpg")
+    redis = MagicMock()
+    redis.mget.return_value = ["https://cached/3"]
+
+    with patch("app.images.cache.redis_client", redis), \
+         patch("app.images.cache.generate_signed_url"):
+        assert get_signed_url_cached(image) == "https://cached/3"
+        assert get_signed_url_cached(image) == "https://cached/3"
+
+    redis.mget.assert_called_once()
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    with patch("app.core.local_cache.time.monotonic", return_value=100.0):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+
+    with patch("app.core.local_cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == 1
+    with patch("app.core.local_cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_thumbnail_urls_use_derived_blob_and_own_cache_key():
+    image = SimpleNamespace(id=5, filepath="1/abc_img5.jpg")
+    redis = MagicMock()
+    redis.mget.return_value = [None]
+
+    with patch("app.images.cache.redis_client", redis), \
+         patch("app.images.cache.generate_signed_url", side_effect=lambda path, hours: f"https://new/{path}"):
+        urls = get_thumbnail_urls_cached([image], 256)
+
+    assert urls == {5: "https://new/1/thumbnails/256/abc_img5.jpg.webp"}
+    redis.mget.assert_called_once_with(["signed_url:image:5:thumbnail:256"])
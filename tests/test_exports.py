@@ -0,0 +1,94 @@
+import io
+import json
+import struct
+import zipfile
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.security import get_current_user
+from app.auth.models import User
+from app.images.models import Image
+from app.annotations.models import Annotation, Tag
+from app.utils.image_info import get_image_info, get_image_size
+
+# Minimal PNG header: 200x100
+PNG = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 200, 100) + b"\x08\x02\x00\x00\x00"
+
+
+@pytest.fixture(autouse=True)
+def override_user(test_user: User, client: TestClient):
+    from app.main import app
+    app.dependency_overrides[get_current_user] = lambda: test_user
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+@pytest.fixture
+def test_project(client: TestClient):
+    response = client.post("/projects/", json={"name": "Test Project", "description": "A project for testing"})
+    assert response.status_code == 201
+    return response.json()
+
+@pytest.fixture
+def annotated_images(test_project, db_session):
+    project_id = test_project["id"]
+    tag = Tag(project_id=project_id, name="cat", usage_count=2)
+    db_session.add(tag)
+    db_session.flush()
+
+    images = []
+    for i in range(3):
+        image = Image(filepath=f"{project_id}/img{i}.png", storage_url="https://fake-url.com", project_id=project_id, is_annotated=i > 0)
+        db_session.add(image)
+        db_session.flush()
+        if i > 0:
+            db_session.add(Annotation(image_id=image.id, x=0.1, y=0.2, w=0.5, h=0.5, tag_id=tag.id))
+        images.append(image)
+    db_session.commit()
+    return images
+
+def export(client, project_id, fmt):
+    with patch("app.exports.service.download_blob", return_value=PNG):
+        response = client.get(f"/projects/{project_id}/export?format={fmt}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    return zipfile.ZipFile(io.BytesIO(response.content))
+
+def test_export_yolo(client: TestClient, test_project, annotated_images):
+    zf = export(client, test_project["id"], "yolo")
+
+    assert zf.read("classes.txt") == b"cat"
+    assert zf.read("labels/img0.txt") == b""
+    assert zf.read("labels/img1.txt") == b"0 0.350000 0.450000 0.500000 0.500000"
+    assert zf.read("images/img2.png") == PNG
+
+def test_export_coco(client: TestClient, test_project, annotated_images):
+    zf = export(client, test_project["id"], "coco")
+
+    coco = json.loads(zf.read("annotations.json"))
+    assert len(coco["images"]) == 3
+    assert coco["images"][0]["width"] == 200
+    assert coco["categories"] == [{"id": 1, "name": "cat"}]
+    assert [a["bbox"] for a in coco["annotations"]] == [[20.0, 20.0, 100.0, 50.0]] * 2
+
+def test_export_voc(client: TestClient, test_project, annotated_images):
+    zf = export(client, test_project["id"], "voc")
+
+    xml = zf.read("Annotations/img1.xml").decode()
+    assert "<name>cat</name>" in xml
+    assert "<xmin>20</xmin><ymin>20</ymin><xmax>120</xmax><ymax>70</ymax>" in xml
+
+def test_export_invalid_format(client: TestClient, test_project):
+    response = client.get(f"/projects/{test_project['id']}/export?format=csv")
+    assert response.status_code == 422
+
+def test_get_image_size_from_header():
+    assert get_image_size(PNG) == (200, 100)
+    assert get_image_size(b"not an image") is None
+
+def test_get_image_info_reports_mime_type():
+    info = get_image_info(PNG)
+    assert (info.width, info.height, info.mime_type) == (200, 100, "image/png")
+    # Truncated header: the format is known, the dimensions are not
+    assert get_image_info(PNG[:12]).mime_type == "image/png"
+    assert get_image_size(PNG[:12]) is None
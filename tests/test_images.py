@@ -1,4 +1,6 @@
+import hashlib
 import io
+import os
 from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
@@ -24,7 +26,14 @@ def test_upload_single_image_success(client: TestClient, test_project):
     project_id = test_project["id"]
     file_content = b"fake image data"
 
-    with patch("app.images.routes.upload_to_blob") as mock_upload, \
+    uploaded = {}
+
+    def fake_upload(blob_name, data):
+        # The route hands over a stream, not the fully buffered bytes
+        assert not isinstance(data, bytes)
+        uploaded[blob_name] = data.read()
+
+    with patch("app.images.routes.upload_to_blob", side_effect=fake_upload) as mock_upload, \
          patch("app.images.routes.generate_signed_url") as mock_url:
 
         mock_url.return_value = "https://signed.url/test.jpg"
@@ -38,9 +47,91 @@ def test_upload_single_image_success(client: TestClient, test_project):
         data = response.json()
 
         mock_upload.assert_called_once()
+        assert list(uploaded.values()) == [file_content]
         assert data["storage_url"] == "https://signed.url/test.jpg"
         assert "id" in data
 
+def test_upload_duplicate_image_returns_existing(client: TestClient, test_project):
+    project_id = test_project["id"]
+
+    with patch("app.images.routes.upload_to_blob") as mock_upload, \
+         patch("app.images.routes.generate_signed_url", return_value="https://signed.url/a.jpg"), \
+         patch("app.images.routes.get_signed_url_cached", return_value="https://signed.url/a.jpg"):
+        first = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("a.jpg", io.BytesIO(b"same bytes"), "image/jpeg")}
+        )
+        second = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("b.jpg", io.BytesIO(b"same bytes"), "image/jpeg")}
+        )
+
+        assert first.status_code == 201
+        assert second.status_code == 200
+        assert second.json()["id"] == first.json()["id"]
+        # The duplicate never reached blob storage
+        mock_upload.assert_called_once()
+
+        forced = client.post(
+            f"/projects/{project_id}/images/upload?allow_duplicates=true",
+            files={"file": ("c.jpg", io.BytesIO(b"same bytes"), "image/jpeg")}
+        )
+
+        assert forced.status_code == 201
+        assert forced.json()["id"] != first.json()["id"]
+        assert mock_upload.call_count == 2
+
+def test_upload_race_with_identical_content_returns_winner(client: TestClient, test_project):
+    from app.images.dedup import find_existing_images
+
+    project_id = test_project["id"]
+    lookups = []
+
+    def miss_first_lookup(db, project_id, hashes):
+        # The second request's pre-check runs before the first one commits
+        lookups.append(hashes)
+        return {} if len(lookups) == 2 else find_existing_images(db, project_id, hashes)
+
+    with patch("app.images.routes.upload_to_blob"), \
+         patch("app.images.routes.generate_signed_url", return_value="https://signed.url/a.jpg"), \
+         patch("app.images.routes.get_signed_url_cached", return_value="https://signed.url/a.jpg"), \
+         patch("app.images.routes.find_existing_images", side_effect=miss_first_lookup), \
+         patch("app.images.routes.delete_blob_task") as mock_delete:
+        first = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("a.jpg", io.BytesIO(b"racing bytes"), "image/jpeg")}
+        )
+        second = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("b.jpg", io.BytesIO(b"racing bytes"), "image/jpeg")}
+        )
+
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    mock_delete.delay.assert_called_once()
+
+def test_upload_into_purged_project_is_not_found(client: TestClient, test_project, db_session):
+    from app.projects.models import Project
+
+    project_id = test_project["id"]
+
+    def purge_during_upload(blob_name, data):
+        # The ownership check has passed; the purge lands before the INSERT
+        db_session.query(Project).filter(Project.id == project_id).delete()
+        db_session.commit()
+
+    with patch("app.images.routes.upload_to_blob", side_effect=purge_during_upload), \
+         patch("app.images.routes.generate_signed_url", return_value="https://signed.url/a.jpg"), \
+         patch("app.images.routes.delete_blob_task") as mock_delete:
+        response = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("b.jpg", io.BytesIO(b"other bytes"), "image/jpeg")}
+        )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project not found"
+    mock_delete.delay.assert_called_once()
+
 def test_upload_batch_images_success(client: TestClient, test_project):
     project_id = test_project["id"]
     files = [
@@ -61,6 +152,18 @@ def test_upload_batch_images_success(client: TestClient, test_project):
         assert data["total_files"] == 2
         assert data["message"] == "Batch upload is being processed"
 
+        # Only file references go through the broker, the bytes are spooled
+        payload, task_project_id = mock_task.call_args.args
+        assert task_project_id == project_id
+        assert [f["filename"] for f in payload] == ["img1.jpg", "img2.jpg"]
+        assert payload[0]["sha256"] == hashlib.sha256(b"123").hexdigest()
+        assert all("data" not in f for f in payload)
+        with open(payload[0]["path"], "rb") as staged:
+            assert staged.read() == b"123"
+
+        for staged in payload:
+            os.remove(staged["path"])
+
 def test_get_project_images(client: TestClient, test_project):
     project_id = test_project["id"]
     response = client.get(f"/projects/{project_id}/images/")
@@ -109,3 +212,242 @@ def test_delete_nonexistent_image(client: TestClient, test_project):
     response = client.delete(f"/projects/{project_id}/images/9999")
     assert response.status_code == 404
     assert response.json()["detail"] == "Image not found in this project"
+
+def test_get_project_images_cursor_pagination(client: TestClient, test_project, db_session):
+    from datetime import datetime, timedelta
+    from app.projects.stats import bump_project_stats
+
+    project_id = test_project["id"]
+    base = datetime(2025, 1, 1)
+    for i in range(5):
+        db_session.add(Image(
+            filepath=f"{project_id}/img{i}.jpg",
+            storage_url="https://fake-url.com",
+            project_id=project_id,
+            uploaded_at=base + timedelta(minutes=i),
+            is_annotated=False
+        ))
+    bump_project_stats(db_session, project_id, images=5)
+    db_session.commit()
+
+    with patch("app.images.routes.get_signed_urls_cached", side_effect=lambda imgs: {img.id: "https://signed.url" for img in imgs}):
+        first = client.get(f"/projects/{project_id}/images/?page_size=2&include_total=false").json()
+        assert [img["filepath"] for img in first["images"]] == [f"{project_id}/img4.jpg", f"{project_id}/img3.jpg"]
+        assert first["total"] is None
+        assert first["prev_cursor"] is None
+
+        second = client.get(f"/projects/{project_id}/images/?page_size=2&cursor={first['next_cursor']}").json()
+        assert [img["filepath"] for img in second["images"]] == [f"{project_id}/img2.jpg", f"{project_id}/img1.jpg"]
+        assert second["total"] == 5
+
+        last = client.get(f"/projects/{project_id}/images/?page_size=2&cursor={second['next_cursor']}").json()
+        assert [img["filepath"] for img in last["images"]] == [f"{project_id}/img0.jpg"]
+        assert last["next_cursor"] is None
+
+        back = client.get(f"/projects/{project_id}/images/?page_size=2&cursor={last['prev_cursor']}").json()
+        assert back["images"] == second["images"]
+
+def test_get_project_images_invalid_cursor(client: TestClient, test_project):
+    project_id = test_project["id"]
+    response = client.get(f"/projects/{project_id}/images/?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_list_images_prefers_thumbnails_when_ready(client: TestClient, test_project, db_session):
+    from app.projects.stats import bump_project_stats
+
+    project_id = test_project["id"]
+    for name, ready in [("plain.jpg", False), ("thumbed.jpg", True)]:
+        db_session.add(Image(
+            filepath=f"{project_id}/{name}",
+            storage_url="https://fake-url.com",
+            project_id=project_id,
+            thumbnails_ready=ready
+        ))
+    bump_project_stats(db_session, project_id, images=2)
+    db_session.commit()
+
+    with patch("app.images.routes.get_signed_urls_cached", side_effect=lambda imgs: {img.id: f"https://orig/{img.filepath}" for img in imgs}), \
+         patch("app.images.routes.get_thumbnail_urls_cached", side_effect=lambda imgs, size: {img.id: f"https://thumb/{size}/{img.filepath}" for img in imgs}) as mock_thumbs:
+        data = client.get(f"/projects/{project_id}/images/").json()
+
+        urls = {img["filepath"]: img["thumbnail_url"] for img in data["images"]}
+        assert urls == {
+            f"{project_id}/plain.jpg": f"https://orig/{project_id}/plain.jpg",
+            f"{project_id}/thumbed.jpg": f"https://thumb/256/{project_id}/thumbed.jpg",
+        }
+        # Only images with thumbnails are signed twice
+        assert [img.filepath for img in mock_thumbs.call_args.args[0]] == [f"{project_id}/thumbed.jpg"]
+
+        response = client.get(f"/projects/{project_id}/images/?thumbnail_size=99")
+        assert response.status_code == 400
+
+def test_render_thumbnails_fits_each_size():
+    from PIL import Image as PILImage
+    from app.images.thumbnails import render_thumbnails
+
+    source = io.BytesIO()
+    PILImage.new("RGB", (2000, 1000), "red").save(source, "JPEG")
+
+    thumbnails = render_thumbnails(source.getvalue())
+
+    sizes = {}
+    for size, data in thumbnails.items():
+        with PILImage.open(io.BytesIO(data)) as thumb:
+            assert thumb.format == "WEBP"
+            sizes[size] = thumb.size
+    assert sizes == {256: (256, 128), 1024: (1024, 512)}
+
+def test_upload_stores_header_geometry(client: TestClient, test_project, db_session):
+    from PIL import Image as PILImage
+
+    project_id = test_project["id"]
+    content = io.BytesIO()
+    PILImage.new("RGB", (64, 48)).save(content, "PNG")
+    content.seek(0)
+
+    with patch("app.images.routes.upload_to_blob"), \
+         patch("app.images.routes.generate_signed_url", return_value="https://signed.url"):
+        response = client.post(
+            f"/projects/{project_id}/images/upload",
+            files={"file": ("geo.png", content, "image/png")}
+        )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert (data["width"], data["height"], data["mime_type"]) == (64, 48, "image/png")
+    assert data["size_bytes"] == len(content.getvalue())
+
+def test_bulk_delete_images_by_filter_and_ids(client: TestClient, test_project, db_session):
+    from app.annotations.models import Annotation, Tag
+    from app.projects.stats import bump_project_stats, get_project_stats
+
+    project_id = test_project["id"]
+    images = {}
+    for name, annotated in [("a.jpg", False), ("b.jpg", False), ("c.jpg", True), ("d.jpg", True)]:
+        images[name] = Image(
+            filepath=f"{project_id}/{name}",
+            storage_url="u",
+            project_id=project_id,
+            is_annotated=annotated,
+            size_bytes=10,
+            thumbnails_ready=(name == "a.jpg")
+        )
+        db_session.add(images[name])
+    tag = Tag(project_id=project_id, name="cat", usage_count=2)
+    db_session.add(tag)
+    db_session.flush()
+    for name in ["c.jpg", "d.jpg"]:
+        db_session.add(Annotation(image_id=images[name].id, x=0, y=0, w=1, h=1, tag_id=tag.id))
+    bump_project_stats(db_session, project_id, images=4, annotated=2, boxes=2, bytes_stored=40)
+    db_session.commit()
+
+    url = f"/projects/{project_id}/images/bulk-delete"
+    assert client.post(url, json={}).status_code == 400
+
+    with patch("app.images.routes.enqueue_blob_deletes") as mock_enqueue:
+        response = client.post(url, json={"is_annotated": False})
+        assert response.json() == {"deleted": 2}
+        assert sorted(mock_enqueue.call_args.args[0]) == [
+            f"{project_id}/a.jpg",
+            f"{project_id}/b.jpg",
+            f"{project_id}/thumbnails/1024/a.jpg.webp",
+            f"{project_id}/thumbnails/256/a.jpg.webp",
+        ]
+
+        response = client.post(url, json={"image_ids": [images["c.jpg"].id]})
+        assert response.json() == {"deleted": 1}
+
+    remaining = db_session.query(Image).filter(Image.project_id == project_id).all()
+    assert [img.filepath for img in remaining] == [f"{project_id}/d.jpg"]
+
+    db_session.expire_all()
+    stats = get_project_stats(db_session, project_id)
+    assert (stats.total_images, stats.annotated_images, stats.total_boxes, stats.bytes_stored) == (1, 1, 1, 10)
+    assert db_session.get(Tag, tag.id).usage_count == 1
+
+def test_claim_next_image_hands_out_each_image_once(client: TestClient, test_project, db_session):
+    from datetime import datetime, timedelta
+    from tests.conftest import TestingSessionLocal
+
+    project_id = test_project["id"]
+    base = datetime(2025, 1, 1)
+    images = []
+    for i in range(3):
+        images.append(Image(
+            filepath=f"{project_id}/img{i}.jpg",
+            storage_url="u",
+            project_id=project_id,
+            uploaded_at=base + timedelta(minutes=i),
+            is_annotated=False
+        ))
+    db_session.add_all(images)
+    db_session.commit()
+    ids = [img.id for img in images]
+
+    url = f"/projects/{project_id}/images/next"
+    with patch("app.images.routes.get_signed_url_cached", return_value="https://signed.url"):
+        # Another annotator mid-claim on the newest image: skipped, not waited on
+        other = TestingSessionLocal()
+        try:
+            other.query(Image).filter(Image.id == ids[2]).with_for_update().one()
+            first = client.post(url)
+        finally:
+            other.rollback()
+            other.close()
+        assert first.status_code == 200
+        assert first.json()["id"] == ids[1]
+        assert first.json()["storage_url"] == "https://signed.url"
+
+        assert client.post(url).json()["id"] == ids[2]
+        assert client.post(url).json()["id"] == ids[0]
+        assert client.post(url).status_code == 204
+
+        # Saving hands the image back; an expired lease does too
+        client.put(f"/projects/{project_id}/annotations/{ids[1]}", json={"annotations": []})
+        db_session.query(Image).filter(Image.id == ids[0]).update({"claimed_until": base})
+        db_session.commit()
+
+        assert client.post(url).json()["id"] == ids[1]
+        assert client.post(url).json()["id"] == ids[0]
+        assert client.post(url).status_code == 204
+
+def test_delete_image_waits_for_a_concurrent_save(client: TestClient, test_project, db_session):
+    import threading
+    from app.annotations.models import Annotation, Tag
+    from app.annotations.tags import acquire_tags
+    from app.projects.stats import bump_project_stats, get_project_stats
+    from tests.conftest import TestingSessionLocal, wait_for_lock_waiter
+
+    project_id = test_project["id"]
+    image = Image(filepath=f"{project_id}/a.jpg", storage_url="u", project_id=project_id, size_bytes=10)
+    db_session.add(image)
+    bump_project_stats(db_session, project_id, images=1, bytes_stored=10)
+    db_session.commit()
+
+    responses = []
+    deleter = threading.Thread(target=lambda: responses.append(
+        client.delete(f"/projects/{project_id}/images/{image.id}")
+    ))
+
+    # A first save on the image, committed only once the delete is waiting
+    saver = TestingSessionLocal()
+    try:
+        locked = saver.query(Image).filter(Image.id == image.id).with_for_update().one()
+        tag_ids = acquire_tags(saver, project_id, ["cat"])
+        saver.add(Annotation(image_id=image.id, x=0, y=0, w=1, h=1, tag_id=tag_ids["cat"]))
+        bump_project_stats(saver, project_id, boxes=1, annotated=1)
+        locked.is_annotated = True
+
+        deleter.start()
+        wait_for_lock_waiter()
+        saver.commit()
+    finally:
+        saver.close()
+    deleter.join()
+
+    assert responses[0].status_code == 204
+    db_session.expire_all()
+    stats = get_project_stats(db_session, project_id)
+    assert (stats.total_images, stats.annotated_images, stats.total_boxes, stats.bytes_stored) == (0, 0, 0, 0)
+    assert db_session.query(Tag).filter(Tag.name == "cat").one().usage_count == 0
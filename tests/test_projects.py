@@ -0,0 +1,142 @@
+import io
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.security import get_current_user
+from app.auth.models import User
+from app.projects.models import Project
+from app.projects.ownership import ownership_cache
+
+
+@pytest.fixture(autouse=True)
+def override_user(test_user: User, client: TestClient):
+    from app.main import app
+    app.dependency_overrides[get_current_user] = lambda: test_user
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+@pytest.fixture
+def test_project(client: TestClient):
+    response = client.post("/projects/", json={"name": "Test Project", "description": "A project for testing"})
+    assert response.status_code == 201
+    return response.json()
+
+def test_project_ownership_is_cached(client: TestClient, test_project, test_user):
+    project_id = test_project["id"]
+
+    response = client.get(f"/projects/{project_id}/annotations/tags")
+    assert response.status_code == 200
+    assert ownership_cache.get((test_user.id, project_id)).id == project_id
+
+def test_project_not_owned_is_not_found(client: TestClient, db_session):
+    other = User(email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    project = Project(name="Not mine", user_id=other.id)
+    db_session.add(project)
+    db_session.commit()
+
+    response = client.get(f"/projects/{project.id}/annotations/tags")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project not found"
+
+def test_delete_project_invalidates_ownership(client: TestClient, test_project, test_user):
+    project_id = test_project["id"]
+    client.get(f"/projects/{project_id}/annotations/tags")
+
+    with patch("app.projects.routes.purge_project_task.delay") as mock_purge:
+        response = client.delete(f"/projects/{project_id}")
+    assert response.status_code == 204
+    assert ownership_cache.get((test_user.id, project_id)) is None
+    mock_purge.assert_called_once_with(project_id)
+
+    response = client.get(f"/projects/{project_id}/annotations/tags")
+    assert response.status_code == 404
+
+def test_writes_recheck_ownership_past_the_cache(client: TestClient, test_project, test_user, db_session):
+    from datetime import datetime
+    from app.images.models import Image
+
+    project_id = test_project["id"]
+    image = Image(filepath="a.jpg", storage_url="u", project_id=project_id)
+    db_session.add(image)
+    db_session.commit()
+    client.get(f"/projects/{project_id}/annotations/tags")
+
+    # Deleted through another worker: this process's cache never heard of it
+    db_session.query(Project).filter(Project.id == project_id).update({"deleted_at": datetime.now()})
+    db_session.commit()
+
+    assert client.get(f"/projects/{project_id}/annotations/tags").status_code == 200
+    response = client.put(f"/projects/{project_id}/annotations/{image.id}", json={"annotations": []})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project not found"
+
+def test_project_stats_follow_writes(client: TestClient, test_project):
+    project_id = test_project["id"]
+
+    with patch("app.images.routes.upload_to_blob"), \
+         patch("app.images.routes.generate_signed_url", return_value="https://signed.url/test.jpg"):
+        image_ids = [
+            client.post(
+                f"/projects/{project_id}/images/upload",
+                files={"file": (f"img{i}.jpg", io.BytesIO(f"1234{i}".encode()), "image/jpeg")}
+            ).json()["id"]
+            for i in range(2)
+        ]
+
+    client.post(f"/projects/{project_id}/annotations/bulk", json={
+        "image_id": image_ids[0],
+        "annotations": [
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "cat"},
+            {"x": 0, "y": 0, "w": 0.1, "h": 0.1, "tag": "dog"},
+        ]
+    })
+
+    response = client.get(f"/projects/{project_id}/stats")
+    assert response.status_code == 200
+    assert response.json() == {"total_images": 2, "annotated_images": 1, "total_boxes": 2, "bytes_stored": 10}
+
+    # Listing totals come from the stats row
+    with patch("app.images.routes.get_signed_urls_cached", side_effect=lambda imgs: {img.id: "https://signed.url" for img in imgs}):
+        assert client.get(f"/projects/{project_id}/images/").json()["total"] == 1
+        assert client.get(f"/projects/{project_id}/images/annotated").json()["total"] == 1
+
+    client.delete(f"/projects/{project_id}/images/{image_ids[0]}")
+
+    projects = client.get("/projects/").json()
+    assert projects[0]["stats"] == {"total_images": 1, "annotated_images": 0, "total_boxes": 0, "bytes_stored": 5}
+
+def test_purge_project_removes_rows_and_blobs(client: TestClient, test_project, db_session):
+    from app.annotations.models import Annotation, Tag
+    from app.images.models import Image
+    from app.tasks.project_tasks import purge_project_task
+    from tests.conftest import TestingSessionLocal
+
+    project_id = test_project["id"]
+    image = Image(filepath=f"{project_id}/a.jpg", storage_url="u", project_id=project_id)
+    tag = Tag(project_id=project_id, name="cat", usage_count=1)
+    db_session.add_all([image, tag])
+    db_session.flush()
+    db_session.add(Annotation(image_id=image.id, x=0, y=0, w=1, h=1, tag_id=tag.id))
+    db_session.commit()
+
+    with patch("app.projects.routes.purge_project_task.delay"):
+        client.delete(f"/projects/{project_id}")
+    assert client.get("/projects/").json() == []
+
+    blobs = [f"{project_id}/a.jpg", f"{project_id}/thumbnails/256/a.jpg.webp"]
+    with patch("app.database.SessionLocal", TestingSessionLocal), \
+         patch("app.tasks.project_tasks.list_blobs", return_value=iter(blobs)) as mock_list, \
+         patch("app.tasks.project_tasks.delete_blobs") as mock_delete:
+        result = purge_project_task.run(project_id)
+
+    assert result == {"images": 1, "blobs": 2}
+    mock_list.assert_called_once_with(f"{project_id}/")
+    mock_delete.assert_called_once_with(blobs)
+
+    db_session.expire_all()
+    assert db_session.get(Project, project_id) is None
+    assert db_session.query(Annotation).count() == 0
+    assert db_session.query(Tag).count() == 0
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.projects.models import Project
+from app.images.models import Image
+from app.annotations.models import Annotation
+
+
+def explain(db_session, query) -> str:
+    sql = query.statement.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True}
+    )
+    # Tiny test tables would always be seq-scanned; forbid that so the
+    # planner has to show whether a matching index exists at all.
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = db_session.execute(text(f"EXPLAIN {sql}")).all()
+    db_session.rollback()
+    return "\n".join(r[0] for r in rows)
+
+
+@pytest.fixture
+def project(db_session, test_user):
+    project = Project(name="Plans", user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+@pytest.mark.parametrize("is_annotated, index_name", [
+    (False, "ix_images_unannotated_queue"),
+    (True, "ix_images_annotated_queue"),
+])
+def test_image_queue_listing_uses_partial_index(db_session, project, is_annotated, index_name):
+    query = (
+        db_session.query(Image)
+        .filter(Image.project_id == project.id, Image.is_annotated == is_annotated)
+        .filter(Image.uploaded_at < datetime(2030, 1, 1))
+        .order_by(Image.uploaded_at.desc(), Image.id.desc())
+        .limit(11)
+    )
+    plan = explain(db_session, query)
+
+    assert index_name in plan
+    assert "Sort" not in plan
+
+
+def test_annotation_lookup_uses_image_id_index(db_session, project):
+    query = db_session.query(Annotation).filter(Annotation.image_id == 1)
+    plan = explain(db_session, query)
+
+    assert "ix_annotations_image_id" in plan
@@ -0,0 +1,59 @@
+from urllib.parse import urlsplit
+from unittest.mock import patch
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import StorageSettings
+from app.storage.local_disk import LocalDiskStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalDiskStorage(StorageSettings(
+        STORAGE_BACKEND="local",
+        LOCAL_STORAGE_ROOT=str(tmp_path),
+        LOCAL_STORAGE_SECRET="test-secret",
+        LOCAL_STORAGE_PUBLIC_URL="http://testserver/storage"
+    ))
+
+
+def test_local_storage_round_trip(storage):
+    storage.upload("1/a.jpg", b"abcdef")
+    storage.upload("1/thumbnails/256/a.jpg.webp", b"thumb")
+    storage.upload("2/b.jpg", b"other")
+
+    assert storage.download("1/a.jpg") == b"abcdef"
+    assert b"".join(storage.download_stream("1/a.jpg", offset=2, length=3)) == b"cde"
+    assert storage.read_header("1/a.jpg", 4) == (b"abcd", 6)
+    assert sorted(storage.list("1/")) == ["1/a.jpg", "1/thumbnails/256/a.jpg.webp"]
+
+    storage.delete("1/a.jpg")
+    assert list(storage.list("1/a")) == []
+
+    # Already-deleted names are skipped rather than failing the batch
+    storage.delete_many(["1/thumbnails/256/a.jpg.webp", "1/a.jpg"])
+    assert list(storage.list("1/")) == []
+
+
+def test_local_storage_rejects_paths_outside_root(storage):
+    with pytest.raises(ValueError):
+        storage.upload("../escape.jpg", b"x")
+
+
+def test_local_signed_url_serves_file(client: TestClient, storage):
+    storage.upload("1/a.jpg", b"image bytes")
+    url = urlsplit(storage.signed_url("1/a.jpg", timedelta(minutes=5)))
+
+    with patch("app.storage.routes.get_storage", return_value=storage):
+        response = client.get(f"{url.path}?{url.query}")
+        assert response.status_code == 200
+        assert response.content == b"image bytes"
+        assert response.headers["content-type"] == "image/jpeg"
+
+        tampered = url.query.replace("signature=", "signature=0")
+        assert client.get(f"{url.path}?{tampered}").status_code == 403
+
+        expired = urlsplit(storage.signed_url("1/a.jpg", timedelta(minutes=-1)))
+        assert client.get(f"{expired.path}?{expired.query}").status_code == 403
@@ -1,4 +1,5 @@
 from unittest.mock import patch
+import pytest
 from fastapi.testclient import TestClient
 
 def test_get_batch_status(client: TestClient):
@@ -14,3 +15,380 @@ def test_get_batch_status(client: TestClient):
         assert body["task_id"] == "task123"
         assert body["state"] == "SUCCESS"
         assert body["result"] == {"done": True}
+
+def test_process_batch_upload_reports_per_file_failures(tmp_path, db_session, test_user):
+    from app.projects.models import Project
+    from app.images.models import Image
+    from app.tasks.image_tasks import process_batch_upload
+    from tests.conftest import TestingSessionLocal
+
+    project = Project(name="Batch", user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+
+    files = []
+    for name in ["a.jpg", "bad.jpg", "c.jpg"]:
+        path = tmp_path / name
+        path.write_bytes(b"data")
+        files.append({"filename": name, "path": str(path)})
+
+    def fake_upload(blob_name, data):
+        if blob_name.endswith("bad.jpg"):
+            raise RuntimeError("boom")
+
+    with patch("app.database.SessionLocal", TestingSessionLocal), \
+         patch("app.tasks.image_tasks.upload_to_blob", side_effect=fake_upload), \
+         patch("app.tasks.image_tasks.generate_signed_url", return_value="https://signed.url"), \
+         patch.object(process_batch_upload, "update_state"), \
+         patch("app.tasks.progress.publish_progress") as mock_publish:
+        result = process_batch_upload.run(files, project.id)
+
+    assert result["total"] == 3
+    assert result["processed"] == 2
+    assert result["failed"] == [{"filename": "bad.jpg", "error": "boom"}]
+    assert [item["filename"] for item in result["success_items"]] == ["a.jpg", "c.jpg"]
+    assert mock_publish.call_args.args[1:] == ("SUCCESS", result)
+
+    image_ids = {item["image_id"] for item in result["success_items"]}
+    stored = db_session.query(Image).filter(Image.project_id == project.id).all()
+    assert {img.id for img in stored} == image_ids
+
+    # Staged files are removed whether or not their upload succeeded
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_process_batch_upload_skips_duplicates(tmp_path, db_session, test_user):
+    import hashlib
+    from app.projects.models import Project
+    from app.images.models import Image
+    from app.tasks.image_tasks import process_batch_upload
+    from tests.conftest import TestingSessionLocal
+
+    project = Project(name="Dedup", user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+
+    existing = Image(
+        filepath="existing.jpg",
+        storage_url="u",
+        project_id=project.id,
+        content_sha256=hashlib.sha256(b"old").hexdigest()
+    )
+    db_session.add(existing)
+    db_session.commit()
+
+    files = []
+    for name, content in [("a.jpg", b"new"), ("a-copy.jpg", b"new"), ("old.jpg", b"old")]:
+        path = tmp_path / name
+        path.write_bytes(content)
+        files.append({
+            "filename": name,
+            "path": str(path),
+            "sha256": hashlib.sha256(content).hexdigest()
+        })
+
+    with patch("app.database.SessionLocal", TestingSessionLocal), \
+         patch("app.tasks.image_tasks.upload_to_blob") as mock_upload, \
+         patch("app.tasks.image_tasks.generate_signed_url", return_value="https://signed.url"), \
+         patch.object(process_batch_upload, "update_state"), \
+         patch("app.tasks.progress.publish_progress"):
+        result = process_batch_upload.run(files, project.id)
+
+    assert result["processed"] == 1
+    assert mock_upload.call_count == 1
+    new_id = result["success_items"][0]["image_id"]
+    # The in-batch copy is only dropped once the first one is stored
+    assert result["duplicates"] == [
+        {"filename": "old.jpg", "image_id": existing.id},
+        {"filename": "a-copy.jpg", "image_id": new_id},
+    ]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_process_batch_upload_keeps_copy_when_first_fails(tmp_path, db_session, test_user):
+    import hashlib
+    from app.projects.models import Project
+    from app.images.models import Image
+    from app.tasks.image_tasks import process_batch_upload
+    from tests.conftest import TestingSessionLocal
+
+    project = Project(name="Retry", user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+
+    files = []
+    for name in ["a.jpg", "a-copy.jpg"]:
+        path = tmp_path / name
+        path.write_bytes(b"same")
+        files.append({"filename": name, "path": str(path), "sha256": hashlib.sha256(b"same").hexdigest()})
+
+    def fake_upload(blob_name, data):
+        if blob_name.endswith("_a.jpg"):
+            raise RuntimeError("boom")
+
+    with patch("app.database.SessionLocal", TestingSessionLocal), \
+         patch("app.tasks.image_tasks.upload_to_blob", side_effect=fake_upload), \
+         patch("app.tasks.image_tasks.generate_signed_url", return_value="https://signed.url"), \
+         patch.object(process_batch_upload, "update_state"), \
+         patch("app.tasks.progress.publish_progress"):
+        result = process_batch_upload.run(files, project.id)
+
+    assert result["failed"] == [{"filename": "a.jpg", "error": "boom"}]
+    assert [item["filename"] for item in result["success_items"]] == ["a-copy.jpg"]
+    assert result["duplicates"] == []
+    stored = db_session.query(Image).filter(Image.project_id == project.id).all()
+    assert [img.id for img in stored] == [result["success_items"][0]["image_id"]]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_backfill_image_info_reads_headers(db_session, test_user):
+    import struct
+    from app.projects.models import Project
+    from app.images.models import Image
+    from app.projects.stats import bump_project_stats, get_project_stats
+    from app.tasks.image_tasks import backfill_image_info_task
+    from tests.conftest import TestingSessionLocal
+
+    project = Project(name="Backfill", user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+
+    png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480)
+    blobs = {"old.png": (png, 5000), "odd.bin": (b"????", 10)}
+    for name in blobs:
+        db_session.add(Image(filepath=name, storage_url="u", project_id=project.id))
+    bump_project_stats(db_session, project.id, images=2)
+    db_session.commit()
+
+    with patch("app.database.SessionLocal", TestingSessionLocal), \
+         patch("app.tasks.image_tasks.download_blob_header", side_effect=lambda name, length: blobs[name]), \
+         patch.object(backfill_image_info_task, "delay") as mock_delay:
+        result = backfill_image_info_task.run()
+
+    assert result["updated"] == 2
+    mock_delay.assert_not_called()
+
+    db_session.expire_all()
+    stored = {img.filepath: img for img in db_session.query(Image).filter(Image.project_id == project.id)}
+    assert (stored["old.png"].width, stored["old.png"].height) == (640, 480)
+    assert stored["old.png"].mime_type == "image/png"
+    assert stored["odd.bin"].mime_type == "application/octet-stream"
+    assert stored["odd.bin"].width is None
+    assert get_project_stats(db_session, project.id).bytes_stored == 5010
+
+
+def test_enqueue_blob_deletes_chunks_tasks():
+    from app.tasks.blob_tasks import enqueue_blob_deletes, delete_blobs_task, BLOB_DELETE_CHUNK
+
+    names = [f"1/img{i}.jpg" for i in range(BLOB_DELETE_CHUNK * 2 + 1)]
+    with patch.object(delete_blobs_task, "delay") as mock_delay:
+        assert enqueue_blob_deletes(names) == 3
+
+    chunks = [call.args[0] for call in mock_delay.call_args_list]
+    assert [len(chunk) for chunk in chunks] == [BLOB_DELETE_CHUNK, BLOB_DELETE_CHUNK, 1]
+    assert sum(chunks, []) == names
+
+
+def test_configure_worker_engine_rebinds_sessions():
+    import app.database as database
+
+    parent_engine = database.engine
+    try:
+        database.configure_worker_engine()
+
+        assert database.engine is not parent_engine
+        assert database.SessionLocal.kw["bind"] is database.engine
+        assert database.engine.pool.size() == database.settings.DB_WORKER_POOL_SIZE
+    finally:
+        database.engine.dispose()
+        database.engine = parent_engine
+        database.SessionLocal.configure(bind=parent_engine)
+
+
+def test_task_session_rolls_back_and_closes():
+    from app.database import task_session
+
+    with patch("app.database.SessionLocal") as mock_factory:
+        db = mock_factory.return_value
+        with pytest.raises(RuntimeError):
+            with task_session():
+                raise RuntimeError("boom")
+
+    db.rollback.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_publish_progress_stores_snapshot_and_publishes():
+    import json
+    from unittest.mock import MagicMock
+    from app.tasks.progress import publish_progress
+
+    redis = MagicMock()
+    redis.incr.return_value = 3
+
+    with patch("app.tasks.progress.redis_client", redis):
+        event = publish_progress("task123", "PROGRESS", {"current": 1, "total": 2})
+
+    assert event == {"seq": 3, "task_id": "task123", "state": "PROGRESS", "result": {"current": 1, "total": 2}}
+    pipe = redis.pipeline.return_value
+    pipe.publish.assert_called_once_with("task_progress:task123", json.dumps(event))
+    pipe.setex.assert_called_once()
+    pipe.execute.assert_called_once()
+
+
+def test_progress_reporter_coalesces_updates():
+    from unittest.mock import MagicMock
+    from app.tasks.progress import ProgressReporter
+
+    now = [0.0]
+    task = MagicMock()
+    task.request.id = "task123"
+
+    with patch("app.tasks.progress.publish_progress") as mock_publish:
+        reporter = ProgressReporter(task, total=1000, min_interval=0.5, every=100, clock=lambda: now[0])
+
+        for _ in range(50):
+            now[0] += 0.001
+            reporter.advance(nbytes=10)
+        assert task.update_state.call_count == 0
+
+        # Count threshold
+        for _ in range(50):
+            reporter.advance(nbytes=10)
+        assert task.update_state.call_count == 1
+
+        # Time threshold
+        now[0] += 0.5
+        reporter.advance(nbytes=10)
+        assert task.update_state.call_count == 2
+
+        meta = task.update_state.call_args.kwargs["meta"]
+        assert meta["current"] == 101
+        assert meta["bytes_per_sec"] > 0
+        assert meta["eta_seconds"] > 0
+
+        reporter.advance()
+        reporter.finish({"processed": 102})
+
+    # The trailing progress is flushed before the final state
+    assert task.update_state.call_count == 3
+    assert task.update_state.call_args.kwargs["meta"]["current"] == 102
+    assert mock_publish.call_args.args == ("task123", "SUCCESS", {"processed": 102})
+
+
+
+def test_progress_reporter_accepts_zero_timestamp():
+    from unittest.mock import MagicMock
+    from app.tasks.progress import ProgressReporter
+
+    now = [-2.0]
+    reporter = ProgressReporter(MagicMock(), total=100, min_interval=60, every=100, clock=lambda: now[0])
+    reporter.advance(items=10)
+    now[0] = 5.0
+
+    # 0.0 is a real reading, not "use the clock"
+    assert reporter.meta(0.0)["items_per_sec"] == 5.0
+
+class FakePubSub:
+    """In-memory stand-in for redis.asyncio's PubSub."""
+
+    def __init__(self):
+        import asyncio
+        self.subscribe_calls = []
+        self.unsubscribe_calls = []
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.subscribe_calls.append(channel)
+
+    async def unsubscribe(self, channel):
+        self.unsubscribe_calls.append(channel)
+
+    async def get_message(self, timeout):
+        import asyncio
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def test_progress_broker_shares_one_subscription_per_task():
+    import asyncio
+    import json
+    from unittest.mock import MagicMock
+    from app.tasks.progress import ProgressBroker
+
+    pubsub = FakePubSub()
+    client = MagicMock()
+    client.pubsub.return_value = pubsub
+    broker = ProgressBroker(client)
+
+    async def scenario():
+        first = await broker.subscribe("task123")
+        second = await broker.subscribe("task123")
+        assert pubsub.subscribe_calls == ["task_progress:task123"]
+
+        event = {"seq": 1, "task_id": "task123", "state": "PROGRESS", "result": {}}
+        await pubsub.messages.put({
+            "type": "message", "channel": "task_progress:task123", "data": json.dumps(event)
+        })
+        assert await asyncio.wait_for(first.get(), 1) == event
+        assert await asyncio.wait_for(second.get(), 1) == event
+
+        await broker.unsubscribe("task123", first)
+        assert pubsub.unsubscribe_calls == []
+        await broker.unsubscribe("task123", second)
+        assert pubsub.unsubscribe_calls == ["task_progress:task123"]
+        broker._reader.cancel()
+
+    asyncio.run(scenario())
+
+
+def stream_events(client: TestClient, events: list, latest: dict, backend_status: dict, headers=None) -> list:
+    """Run the SSE endpoint against canned broker events and return the (id, data) pairs."""
+    import asyncio
+    import json
+    from unittest.mock import AsyncMock
+
+    queue = asyncio.Queue()
+    for event in events:
+        queue.put_nowait(event)
+
+    with patch("app.tasks.routes.progress_broker") as mock_broker, \
+         patch("app.tasks.routes.get_latest_progress", AsyncMock(return_value=latest)), \
+         patch("app.tasks.routes.get_backend_status", return_value=backend_status), \
+         patch("app.tasks.routes.STATE_CHECK_INTERVAL", 0.05):
+        mock_broker.subscribe = AsyncMock(return_value=queue)
+        mock_broker.unsubscribe = AsyncMock()
+        response = client.get("/tasks/upload/batch/stream/task123", headers=headers or {})
+
+    assert response.status_code == 200
+    ids = [line[4:] for line in response.text.splitlines() if line.startswith("id: ")]
+    data = [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+    return list(zip(ids, [d["state"] for d in data]))
+
+
+def test_stream_resumes_after_last_event_id(client: TestClient):
+    def event(seq, state):
+        return {"seq": seq, "task_id": "task123", "state": state, "result": {}}
+
+    received = stream_events(
+        client,
+        events=[event(2, "PROGRESS"), event(4, "PROGRESS"), event(5, "SUCCESS")],
+        latest=event(3, "PROGRESS"),
+        backend_status=event(0, "PROGRESS"),
+        headers={"Last-Event-ID": "3"}
+    )
+
+    assert received == [("4", "PROGRESS"), ("5", "SUCCESS")]
+
+
+def test_stream_ends_when_task_dies_without_publishing(client: TestClient):
+    received = stream_events(
+        client,
+        events=[],
+        latest={"seq": 1, "task_id": "task123", "state": "PROGRESS", "result": {}},
+        backend_status={"seq": 0, "task_id": "task123", "state": "FAILURE", "result": "worker lost"}
+    )
+
+    assert received == [("1", "PROGRESS"), ("0", "FAILURE")]